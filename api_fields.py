@@ -0,0 +1,209 @@
+"""
+Sparse fieldsets and related-resource includes for the REST API
+``?fields=a,b`` limits a resource to the listed fields, which are loaded
+with load_only() so unused columns never leave the database. ``?include=rel``
+embeds related resources, batch-loaded with one IN query per relation, and
+``?fields[rel]=a,b`` narrows an included resource the same way. Without
+either parameter responses keep their usual to_dict() shape.
+"""
+
+from datetime import date, datetime
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+from models import Student, Subject, Grade, Attendance, Enrollment
+
+class Computed:
+    """A derived field: read from ``columns`` by ``getter``, or filled for a
+    whole result set at once by ``batch(ids) -> {id: value}``"""
+
+    def __init__(self, columns=(), getter=None, batch=None, default=None):
+        self.columns = columns
+        self.getter = getter
+        self.batch = batch
+        self.default = default
+
+class Include:
+    """A relation that can be embedded: rows of ``resource`` whose
+    ``remote_key`` equals this row's ``local_key``"""
+
+    def __init__(self, resource, local_key, remote_key, many=False):
+        self.resource = resource
+        self.local_key = local_key
+        self.remote_key = remote_key
+        self.many = many
+
+class Resource:
+    """The selectable fields and includable relations of one model"""
+
+    def __init__(self, name, model, exclude=(), computed=None, includes=None):
+        self.name = name
+        self.model = model
+        self.columns = [attr.key for attr in inspect(model).column_attrs if attr.key not in exclude]
+        self.computed = computed or {}
+        self.includes = includes or {}
+
+    def parse_fields(self, value):
+        """Field names from a comma separated list; raises ValueError for unknown names"""
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.columns and name not in self.computed]
+        if unknown:
+            raise ValueError(f"Unknown {self.name} fields: {', '.join(unknown)}")
+        # The primary key is always returned so clients can address the row
+        return ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+
+    def required_columns(self, fields):
+        columns = set()
+        for name in fields:
+            if name in self.computed:
+                columns.update(self.computed[name].columns)
+            else:
+                columns.add(name)
+        return columns
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+RESOURCES = {resource.name: resource for resource in [
+    Resource('student', Student, exclude=('password_hash',), computed={
+        'full_name': Computed(('first_name', 'last_name'), lambda s: s.full_name),
+        'age': Computed(('date_of_birth',), lambda s: s.age)
+    }, includes={
+        'grades': Include('grade', 'id', 'student_id', many=True),
+        'enrollments': Include('enrollment', 'id', 'student_id', many=True)
+    }),
+    Resource('subject', Subject, computed={
+        'enrolled_count': Computed(batch=Subject.enrolled_counts, default=0)
+    }),
+    Resource('grade', Grade, includes={
+        'student': Include('student', 'student_id', 'id'),
+        'subject': Include('subject', 'subject_id', 'id')
+    }),
+    Resource('attendance', Attendance, includes={
+        'student': Include('student', 'student_id', 'id')
+    }),
+    Resource('enrollment', Enrollment, includes={
+        'student': Include('student', 'student_id', 'id'),
+        'subject': Include('subject', 'subject_id', 'id')
+    })
+]}
+
+class FieldSelection:
+    """Parsed ``fields``/``include`` parameters for one resource type"""
+
+    def __init__(self, resource, fields=None, includes=(), include_fields=None):
+        self.resource = resource
+        self.fields = fields
+        self.includes = list(includes)
+        self.include_fields = include_fields or {}
+
+    @classmethod
+    def from_request(cls, resource_name, args):
+        """Build from request args; raises ValueError for unknown fields or relations"""
+        resource = RESOURCES[resource_name]
+        fields = resource.parse_fields(args['fields']) if args.get('fields') else None
+
+        includes = [name.strip() for name in args.get('include', '').split(',') if name.strip()]
+        unknown = [name for name in includes if name not in resource.includes]
+        if unknown:
+            raise ValueError(f"Cannot include {', '.join(unknown)} on {resource_name}; "
+                             f"available: {', '.join(resource.includes) or 'none'}")
+
+        include_fields = {}
+        for key, value in args.items():
+            if key.startswith('fields[') and key.endswith(']'):
+                name = key[len('fields['):-1]
+                if name not in includes:
+                    raise ValueError(f"{key} given but {name} is not included")
+                target = RESOURCES[resource.includes[name].resource]
+                include_fields[name] = target.parse_fields(value)
+
+        return cls(resource, fields, dict.fromkeys(includes), include_fields)
+
+    @property
+    def active(self):
+        return self.fields is not None or bool(self.includes)
+
+    def apply(self, query, extra_columns=()):
+        """Restrict the SELECT to the columns the requested fields need.
+
+        ``extra_columns`` are loaded as well, e.g. the sort keys a paginator
+        reads back from the rows.
+        """
+        if self.fields is None:
+            return query
+        columns = self.resource.required_columns(self.fields) | set(extra_columns)
+        columns.update(self.resource.includes[name].local_key for name in self.includes)
+        return query.options(load_only(*[getattr(self.resource.model, key) for key in sorted(columns)]))
+
+    def _batches(self, rows, names):
+        """Values of the batch-computed fields among ``names``, per field and row id"""
+        ids = [row.id for row in rows]
+        return {
+            name: computed.batch(ids) if ids else {}
+            for name, computed in self.resource.computed.items()
+            if name in names and computed.batch
+        }
+
+    def _serialize_fields(self, rows):
+        batches = self._batches(rows, self.fields)
+
+        items = []
+        for row in rows:
+            item = {}
+            for name in self.fields:
+                computed = self.resource.computed.get(name)
+                if computed is None:
+                    item[name] = _json_value(getattr(row, name))
+                elif computed.batch:
+                    item[name] = batches[name].get(row.id, computed.default)
+                else:
+                    item[name] = computed.getter(row)
+            items.append(item)
+        return items
+
+    def _load_include(self, name, rows):
+        include = self.resource.includes[name]
+        target = RESOURCES[include.resource]
+        keys = {getattr(row, include.local_key) for row in rows} - {None}
+        if not keys:
+            return {}
+
+        remote = getattr(target.model, include.remote_key)
+        selection = FieldSelection(target, self.include_fields.get(name))
+        query = selection.apply(target.model.query.filter(remote.in_(keys)), extra_columns=(include.remote_key,))
+        related = query.order_by(target.model.id).all()
+
+        grouped = {}
+        for row, item in zip(related, selection.serialize(related)):
+            key = getattr(row, include.remote_key)
+            if include.many:
+                grouped.setdefault(key, []).append(item)
+            else:
+                grouped[key] = item
+        return grouped
+
+    def serialize(self, rows):
+        """Rows as dicts with the selected fields and included relations"""
+        if self.fields is None:
+            # Batch-computed fields are loaded for all rows at once and handed
+            # to to_dict(), which would otherwise query them row by row
+            batches = self._batches(rows, self.resource.computed)
+            items = [row.to_dict(**{
+                name: values.get(row.id, self.resource.computed[name].default) for name, values in batches.items()
+            }) for row in rows]
+        else:
+            items = self._serialize_fields(rows)
+
+        for name in self.includes:
+            include = self.resource.includes[name]
+            related = self._load_include(name, rows)
+            empty = [] if include.many else None
+            for row, item in zip(rows, items):
+                value = related.get(getattr(row, include.local_key), empty)
+                item[name] = list(value) if include.many else value
+        return items
+
+    def serialize_one(self, row):
+        return self.serialize([row])[0]
@@ -3,9 +3,25 @@ RESTful API Routes for School Management System
 Provides comprehensive CRUD operations for all entities
 """
 
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, send_file, url_for
 from flask_login import login_required, current_user
 from models import db, Student, Teacher, Subject, Grade, Attendance, Enrollment, Assignment, AssignmentTemplate, Event, AcademicYear, SubjectTeacher
+from attendance_rollup import apply_attendance_changes, attendance_snapshot, daily_attendance
+from attendance_bulk import record_bulk_attendance, bulk_event_data
+from dashboard_stats import dashboard_payload
+from stats_cache import stats_cache
+from live_counters import live_counters
+from data_version import conditional_get
+from student_search import apply_student_search
+from pagination import keyset_paginate
+from api_fields import FieldSelection
+from student_directory import student_directory
+from student_import import import_student_file
+from student_ids import next_student_id
+from student_profile import ALL_SECTIONS, load_student_profile
+from export_jobs import EXPORT_FORMATS, export_jobs
+from export_datasets import parse_since
+from delta_sync import SYNC_DATASETS, SYNC_PAGE_SIZE, MAX_SYNC_PAGE_SIZE, changes_page, tombstones_page
 from datetime import datetime, date, timedelta
 from sqlalchemy import func, desc, or_
 from werkzeug.utils import secure_filename
@@ -24,6 +40,7 @@ def set_socketio(socketio):
 # Helper to emit socket events
 def emit_socket_event(event_name, data):
     """Emit a socket.io event if socketio is available"""
+    live_counters.apply_event(event_name, data)
     if socketio_instance:
         try:
             socketio_instance.emit(event_name, data, broadcast=True, namespace='/')
@@ -31,6 +48,13 @@ def emit_socket_event(event_name, data):
             print(f"Socket emit error: {e}")
             pass
 
+@api_bp.after_request
+def invalidate_stats_after_write(response):
+    """Successful API writes change dashboard figures, so drop cached stats"""
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        stats_cache.invalidate()
+    return response
+
 # ==================== HELPER FUNCTIONS ====================
 
 def success_response(data=None, message="Success", status=200):
@@ -51,6 +75,15 @@ def error_response(message="Error", status=400, errors=None):
     }
     return jsonify(response), status
 
+def subject_event_data(subject):
+    """Realtime payload for subject events (matches notify_subject_* in app.py)"""
+    return {
+        'id': subject.id,
+        'name': subject.name,
+        'code': subject.code,
+        'is_active': subject.is_active
+    }
+
 def parse_date(date_string):
     """Parse date string to date object"""
     if not date_string:
@@ -64,25 +97,38 @@ def parse_date(date_string):
 
 @api_bp.route('/students', methods=['GET'])
 @login_required
+@conditional_get('student', 'grade', 'enrollment')
 def get_students():
-    """Get all students with filters and pagination"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    """Get all students with filters and pagination.
+
+    Cursor pagination by default: pass the returned ``next``/``prev`` cursor
+    back as ``?cursor=``. ``count`` selects how ``total`` is computed:
+    exact (default), estimated (planner statistics, flagged by
+    ``total_is_estimate``) or none. Sending ``page`` keeps the legacy offset
+    pagination response. Supports ``fields`` and ``include`` (grades,
+    enrollments).
+    """
+    page = request.args.get('page', type=int)
+    cursor = request.args.get('cursor', '')
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    count_mode = request.args.get('count', 'exact')
     search = request.args.get('search', '')
     grade_filter = request.args.get('grade', '')
     status_filter = request.args.get('status', 'active')
     
-    query = Student.query
+    if count_mode not in ('exact', 'estimated', 'none'):
+        return error_response("count must be one of: exact, estimated, none", 400)
+    
+    try:
+        selection = FieldSelection.from_request('student', request.args)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    # The sort keys are read back from the rows to build cursors
+    query = selection.apply(Student.query, extra_columns=('last_name', 'first_name'))
     
     if search:
-        query = query.filter(
-            or_(
-                Student.first_name.ilike(f'%{search}%'),
-                Student.last_name.ilike(f'%{search}%'),
-                Student.email.ilike(f'%{search}%'),
-                Student.student_id.ilike(f'%{search}%')
-            )
-        )
+        query = apply_student_search(query, search, rank=page is not None)
     
     if grade_filter:
         query = query.filter(Student.grade_level == grade_filter)
@@ -90,34 +136,48 @@ def get_students():
     if status_filter:
         query = query.filter(Student.status == status_filter)
     
-    pagination = query.order_by(Student.last_name, Student.first_name).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    if page is not None:
+        pagination = query.order_by(Student.last_name, Student.first_name).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return success_response({
+            'students': selection.serialize(pagination.items),
+            'total': pagination.total,
+            'pages': pagination.pages,
+            'current_page': page
+        })
     
-    students = [student.to_dict() for student in pagination.items]
+    try:
+        students_page = keyset_paginate(query, (Student.last_name, Student.first_name, Student.id),
+                                        cursor=cursor, per_page=per_page, count=count_mode)
+    except ValueError as e:
+        return error_response(str(e), 400)
     
     return success_response({
-        'students': students,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
+        'students': selection.serialize(students_page.items),
+        'cursors': students_page.cursors(),
+        'total': students_page.total,
+        'total_is_estimate': students_page.total_is_estimate
     })
 
-@api_bp.route('/students/<int:id>', methods=['GET'])
+@api_bp.route('/students/lookup', methods=['GET'])
 @login_required
-def get_student(id):
-    """Get a single student by ID"""
-    student = Student.query.get_or_404(id)
+def lookup_students():
+    """Typeahead lookup for the grade and attendance forms.
+
+    Prefix match of every word in ``q`` against student ID, first and last
+    name; teachers only see the students they teach. Served from the
+    in-process student directory, so no student rows are read per keystroke.
+    """
+    if current_user.role not in ('admin', 'teacher'):
+        return error_response("Access denied", 403)
     
-    # Get additional data
-    grades = [g.to_dict() for g in student.grades.limit(10).all()]
-    attendance_rate = student.get_attendance_rate()
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    teacher_user_id = current_user.id if current_user.role == 'teacher' else None
     
-    return success_response({
-        'student': student.to_dict(),
-        'grades': grades,
-        'attendance_rate': attendance_rate
-    })
+    return success_response(student_directory.lookup_students(query, teacher_user_id, limit))
 
 @api_bp.route('/students', methods=['POST'])
 @login_required
@@ -127,9 +187,7 @@ def create_student():
     
     try:
         # Generate unique student ID
-        last_student = Student.query.order_by(desc(Student.id)).first()
-        next_id = (last_student.id + 1) if last_student else 1
-        student_id = f"STU{next_id:06d}"
+        student_id = next_student_id()
         
         student = Student(
             student_id=student_id,
@@ -164,6 +222,84 @@ def create_student():
         db.session.rollback()
         return error_response(f"Error creating student: {str(e)}", 400)
 
+@api_bp.route('/students/<int:id>', methods=['GET'])
+@login_required
+@conditional_get('student', 'grade', 'attendance', date_sensitive=True)
+def get_student(id):
+    """Get a single student by ID (``fields`` narrows the student object)"""
+    try:
+        selection = FieldSelection.from_request('student', {'fields': request.args.get('fields', '')})
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    profile = load_student_profile(id, sections=('grades', 'attendance'), grade_limit=10)
+    if profile is None:
+        return error_response("Student not found", 404)
+    
+    return success_response({
+        'student': selection.serialize_one(profile.student),
+        'grades': [g.to_dict() for g in profile.grades],
+        'attendance_rate': profile.attendance_rate
+    })
+
+@api_bp.route('/students/<int:id>/full', methods=['GET'])
+@login_required
+@conditional_get('student', 'grade', 'subject', 'enrollment', 'attendance', 'fee_structure', 'fee_payment',
+                 'assignment', 'assignment_template', date_sensitive=True)
+def get_student_full(id):
+    """Student 360 profile: grades, enrollments, attendance, fees and assignments in one response.
+
+    Optional ``sections`` (comma separated) narrows the response, e.g.
+    ``?sections=grades,fees``. Teachers only see students they teach.
+    """
+    if current_user.role not in ('admin', 'teacher'):
+        return error_response("Access denied", 403)
+    
+    sections = ALL_SECTIONS
+    if request.args.get('sections'):
+        sections = [name.strip() for name in request.args['sections'].split(',') if name.strip()]
+        unknown = sorted(set(sections) - set(ALL_SECTIONS))
+        if unknown:
+            return error_response(f"Unknown sections: {', '.join(unknown)}", 400)
+    
+    days = min(max(request.args.get('days', 30, type=int), 1), 365)
+    teacher_user_id = current_user.id if current_user.role == 'teacher' else None
+    profile = load_student_profile(id, sections=sections, teacher_user_id=teacher_user_id, attendance_days=days)
+    if profile is None:
+        return error_response("Student not found", 404)
+    if not profile.teacher_can_access:
+        return error_response("You can only view students you teach", 403)
+    
+    return success_response(profile.to_dict())
+
+@api_bp.route('/students/import', methods=['POST'])
+@login_required
+def import_students():
+    """Bulk-create students from an uploaded CSV/XLSX file (multipart field ``file``).
+
+    Pass ``dry_run=true`` to validate without writing. Rows that fail
+    validation are skipped and returned in ``errors`` with their row number.
+    """
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return error_response("No file uploaded", 400)
+    if not upload.filename.lower().endswith(('.csv', '.xlsx')):
+        return error_response("Only CSV and .xlsx files can be imported", 400)
+    
+    dry_run = request.args.get('dry_run', request.form.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+    try:
+        result = import_student_file(upload.stream, upload.filename, dry_run=dry_run)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    if result.imported:
+        if live_counters.seeded:
+            live_counters.reconcile()
+        emit_socket_event('students_imported', {'count': result.imported})
+    
+    status = 201 if result.imported else 200
+    return success_response(result.to_dict(), f"Imported {result.imported} of {result.rows} rows", status)
+
 @api_bp.route('/students/<int:id>', methods=['PUT'])
 @login_required
 def update_student(id):
@@ -198,6 +334,8 @@ def update_student(id):
         
         db.session.commit()
         
+        emit_socket_event('student_updated', student.to_dict())
+        
         return success_response(student.to_dict(), "Student updated successfully")
     
     except Exception as e:
@@ -215,6 +353,8 @@ def delete_student(id):
         student.updated_at = datetime.utcnow()
         db.session.commit()
         
+        emit_socket_event('student_deleted', {'student_id': id})
+        
         return success_response(None, "Student deleted successfully")
     
     except Exception as e:
@@ -225,15 +365,27 @@ def delete_student(id):
 
 @api_bp.route('/subjects', methods=['GET'])
 @login_required
+@conditional_get('subject', 'enrollment')
 def get_subjects():
-    """Get all subjects"""
-    subjects = Subject.query.filter_by(is_active=True).all()
-    return success_response([subject.to_dict() for subject in subjects])
+    """Get all subjects (supports ``fields``)"""
+    try:
+        selection = FieldSelection.from_request('subject', request.args)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    subjects = selection.apply(Subject.query.filter_by(is_active=True)).all()
+    return success_response(selection.serialize(subjects))
 
 @api_bp.route('/subjects/<int:id>', methods=['GET'])
 @login_required
+@conditional_get('subject', 'enrollment', 'student')
 def get_subject(id):
-    """Get a single subject"""
+    """Get a single subject (``fields`` narrows the subject object)"""
+    try:
+        selection = FieldSelection.from_request('subject', request.args)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
     subject = Subject.query.get_or_404(id)
     
     # Get enrolled students
@@ -241,7 +393,7 @@ def get_subject(id):
     students = [{'id': e.student.id, 'name': e.student.full_name} for e in enrollments]
     
     return success_response({
-        'subject': subject.to_dict(),
+        'subject': selection.serialize_one(subject),
         'enrolled_students': students
     })
 
@@ -265,6 +417,8 @@ def create_subject():
         db.session.add(subject)
         db.session.commit()
         
+        emit_socket_event('subject_created', subject_event_data(subject))
+        
         return success_response(subject.to_dict(), "Subject created successfully", 201)
     
     except Exception as e:
@@ -291,6 +445,8 @@ def update_subject(id):
         
         db.session.commit()
         
+        emit_socket_event('subject_updated', subject_event_data(subject))
+        
         return success_response(subject.to_dict(), "Subject updated successfully")
     
     except Exception as e:
@@ -308,6 +464,8 @@ def delete_subject(id):
         subject.updated_at = datetime.utcnow()
         db.session.commit()
         
+        emit_socket_event('subject_updated', subject_event_data(subject))
+        
         return success_response(None, "Subject deleted successfully")
     
     except Exception as e:
@@ -318,8 +476,14 @@ def delete_subject(id):
 
 @api_bp.route('/attendance', methods=['GET'])
 @login_required
+@conditional_get('attendance', 'student')
 def get_attendance():
-    """Get attendance records with filters"""
+    """Get attendance records with filters (supports ``fields`` and ``include=student``)"""
+    try:
+        selection = FieldSelection.from_request('attendance', request.args)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
     date_str = request.args.get('date')
     student_id = request.args.get('student_id', type=int)
     status = request.args.get('status')
@@ -335,9 +499,9 @@ def get_attendance():
     if status:
         query = query.filter(Attendance.status == status)
     
-    records = query.order_by(desc(Attendance.date)).limit(100).all()
+    records = selection.apply(query).order_by(desc(Attendance.date)).limit(100).all()
     
-    return success_response([record.to_dict() for record in records])
+    return success_response(selection.serialize(records))
 
 @api_bp.route('/attendance', methods=['POST'])
 @login_required
@@ -356,8 +520,11 @@ def create_attendance():
         )
         
         db.session.add(attendance)
+        apply_attendance_changes(added=[attendance])
         db.session.commit()
         
+        emit_socket_event('attendance_recorded', attendance.to_dict())
+        
         return success_response(attendance.to_dict(), "Attendance recorded successfully", 201)
     
     except Exception as e:
@@ -367,23 +534,18 @@ def create_attendance():
 @api_bp.route('/attendance/bulk', methods=['POST'])
 @login_required
 def bulk_attendance():
-    """Create multiple attendance records at once"""
-    data = request.get_json()
+    """Create multiple attendance records at once (one INSERT, one realtime event)"""
+    data = request.get_json(silent=True) or {}
     records = data.get('records', [])
     
     try:
-        for record in records:
-            attendance = Attendance(
-                student_id=record.get('student_id'),
-                date=parse_date(record.get('date')),
-                status=record.get('status'),
-                period=record.get('period'),
-                recorded_by=current_user.id
-            )
-            db.session.add(attendance)
-        
+        rows = record_bulk_attendance([
+            dict(record, date=parse_date(record.get('date'))) for record in records
+        ], recorded_by=current_user.id)
         db.session.commit()
         
+        if rows:
+            emit_socket_event('attendance_recorded', bulk_event_data(rows))
         return success_response(None, f"{len(records)} attendance records created successfully", 201)
     
     except Exception as e:
@@ -398,10 +560,12 @@ def update_attendance(id):
     data = request.get_json()
     
     try:
+        before = attendance_snapshot(attendance)
         attendance.status = data.get('status', attendance.status)
         attendance.period = data.get('period', attendance.period)
         attendance.notes = data.get('notes', attendance.notes)
         attendance.updated_at = datetime.utcnow()
+        apply_attendance_changes(added=[attendance], removed=[before])
         
         db.session.commit()
         
@@ -418,6 +582,7 @@ def delete_attendance(id):
     attendance = Attendance.query.get_or_404(id)
     
     try:
+        apply_attendance_changes(removed=[attendance])
         db.session.delete(attendance)
         db.session.commit()
         
@@ -431,8 +596,14 @@ def delete_attendance(id):
 
 @api_bp.route('/grades', methods=['GET'])
 @login_required
+@conditional_get('grade', 'student', 'subject')
 def get_grades():
-    """Get grades with filters"""
+    """Get grades with filters (supports ``fields`` and ``include=student,subject``)"""
+    try:
+        selection = FieldSelection.from_request('grade', request.args)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
     student_id = request.args.get('student_id', type=int)
     subject_id = request.args.get('subject_id', type=int)
     
@@ -444,9 +615,9 @@ def get_grades():
     if subject_id:
         query = query.filter(Grade.subject_id == subject_id)
     
-    grades = query.order_by(desc(Grade.date_recorded)).limit(100).all()
+    grades = selection.apply(query).order_by(desc(Grade.date_recorded)).limit(100).all()
     
-    return success_response([grade.to_dict() for grade in grades])
+    return success_response(selection.serialize(grades))
 
 @api_bp.route('/grades', methods=['POST'])
 @login_required
@@ -540,102 +711,133 @@ def delete_grade(id):
 
 @api_bp.route('/stats/dashboard', methods=['GET'])
 @login_required
+@conditional_get('student', 'subject', 'grade', 'attendance', date_sensitive=True)
 def get_dashboard_stats():
     """Get comprehensive dashboard statistics"""
-    
-    # Student statistics
-    total_students = Student.query.filter_by(status='active').count()
-    total_subjects = Subject.query.filter_by(is_active=True).count()
-    
-    # Recent enrollments (last 30 days)
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_enrollments = Student.query.filter(
-        Student.enrollment_date >= thirty_days_ago.date()
-    ).count()
-    
-    # Attendance rate (current month)
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
-    total_attendance = Attendance.query.filter(
-        func.extract('month', Attendance.date) == current_month,
-        func.extract('year', Attendance.date) == current_year
-    ).count()
-    
-    present_attendance = Attendance.query.filter(
-        func.extract('month', Attendance.date) == current_month,
-        func.extract('year', Attendance.date) == current_year,
-        Attendance.status == 'present'
-    ).count()
-    
-    attendance_rate = round((present_attendance / total_attendance * 100), 1) if total_attendance > 0 else 0
-    
-    # Average GPA
-    avg_gpa = db.session.query(func.avg(Student.gpa)).scalar() or 0
-    avg_gpa = round(avg_gpa, 2)
-    
-    # Grade distribution
-    grade_dist = db.session.query(
-        Grade.letter_grade,
-        func.count(Grade.id).label('count')
-    ).group_by(Grade.letter_grade).all()
-    
-    grade_distribution = [{'grade': g[0], 'count': g[1]} for g in grade_dist if g[0]]
-    
-    # Students by grade level
-    grade_level_dist = db.session.query(
-        Student.grade_level,
-        func.count(Student.id).label('count')
-    ).filter(Student.status == 'active').group_by(Student.grade_level).all()
-    
-    students_by_grade = [{'grade': g[0], 'count': g[1]} for g in grade_level_dist]
-    
-    # Enrollment trend (last 12 months)
-    enrollment_trend = []
-    for i in range(12):
-        date = datetime.now() - timedelta(days=30*i)
-        count = Student.query.filter(
-            Student.enrollment_date <= date.date()
-        ).count()
-        enrollment_trend.append({
-            'month': date.strftime('%b %Y'),
-            'count': count
-        })
+    stats = stats_cache.get_or_compute('dashboard_payload', dashboard_payload)
     
     return success_response({
-        'overview': {
-            'total_students': total_students,
-            'total_subjects': total_subjects,
-            'recent_enrollments': recent_enrollments,
-            'attendance_rate': attendance_rate,
-            'average_gpa': avg_gpa
-        },
-        'grade_distribution': grade_distribution,
-        'students_by_grade': students_by_grade,
-        'enrollment_trend': list(reversed(enrollment_trend))
+        'overview': stats['overview'],
+        'grade_distribution': stats['grade_distribution'],
+        'students_by_grade': stats['students_by_grade'],
+        'enrollment_trend': stats['enrollment_trend']
     })
 
 @api_bp.route('/stats/attendance-trend', methods=['GET'])
 @login_required
+@conditional_get('attendance', date_sensitive=True)
 def get_attendance_trend():
-    """Get attendance trend for last 30 days"""
-    days = request.args.get('days', 30, type=int)
-    
-    trend = []
-    for i in range(days):
-        date = datetime.now().date() - timedelta(days=i)
-        total = Attendance.query.filter(Attendance.date == date).count()
-        present = Attendance.query.filter(
-            Attendance.date == date,
-            Attendance.status == 'present'
-        ).count()
-        
-        rate = round((present / total * 100), 1) if total > 0 else 0
-        trend.append({
-            'date': date.isoformat(),
-            'rate': rate,
-            'total': total,
-            'present': present
-        })
+    """Get attendance trend for last 30 days (optionally for a single period)"""
+    days = max(request.args.get('days', 30, type=int), 1)
+    period = request.args.get('period')
+    
+    today = datetime.now().date()
+    trend = daily_attendance(today - timedelta(days=days - 1), today, period=period)
     
-    return success_response(list(reversed(trend)))
+    return success_response([{
+        'date': day['date'].isoformat(),
+        'rate': day['rate'],
+        'total': day['total'],
+        'present': day['present']
+    } for day in trend])
+
+# ==================== EXPORT JOBS API ====================
+
+def export_job_data(job):
+    data = job.to_dict()
+    data['status_url'] = url_for('api.get_export_job', job_id=job.id)
+    data['download_url'] = url_for('api.download_export_job', job_id=job.id) if job.status == 'done' else None
+    return data
+
+@api_bp.route('/exports', methods=['POST'])
+@login_required
+def create_export_job():
+    """Queue a background export.
+
+    Body: ``{"dataset": "students|grades|attendance|enrollments|fees",
+    "format": "csv|excel|pdf", "filters": {...}}``; student filters are
+    search, grade, status and student_ids, and every dataset but subjects
+    takes ``since`` for a delta export. Progress is sent as ``export_job_updated`` socket events and
+    can be polled at ``status_url``.
+    """
+    if current_user.role not in ('admin', 'teacher'):
+        return error_response("Access denied", 403)
+    
+    data = request.get_json(silent=True) or {}
+    filters = data.get('filters') or {}
+    if not isinstance(filters, dict):
+        return error_response("filters must be an object", 400)
+    
+    try:
+        job = export_jobs.submit(current_user, data.get('dataset', ''), data.get('format', 'excel'), filters)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    return success_response(export_job_data(job), "Export queued", 202)
+
+@api_bp.route('/exports', methods=['GET'])
+@login_required
+def list_export_jobs():
+    """The current user's recent export jobs, newest first"""
+    return success_response([export_job_data(job) for job in export_jobs.recent(current_user)])
+
+@api_bp.route('/exports/<job_id>', methods=['GET'])
+@login_required
+def get_export_job(job_id):
+    """Status and progress of one export job"""
+    job = export_jobs.get(job_id, current_user)
+    if job is None:
+        return error_response("Export job not found", 404)
+    return success_response(export_job_data(job))
+
+@api_bp.route('/exports/<job_id>/download', methods=['GET'])
+@login_required
+def download_export_job(job_id):
+    """Download the file of a finished export job"""
+    job = export_jobs.get(job_id, current_user)
+    if job is None:
+        return error_response("Export job not found", 404)
+    
+    path = export_jobs.artifact(job)
+    if path is None:
+        if job.status == 'done':
+            return error_response("Export file has expired", 410)
+        return error_response(f"Export is {job.status}", 409)
+    
+    return send_file(path, as_attachment=True, download_name=job.filename,
+                     mimetype=EXPORT_FORMATS[job.format][1])
+
+# ==================== DELTA SYNC API ====================
+
+def sync_page(feed, fetch_page):
+    if current_user.role != 'admin':
+        return error_response("Access denied", 403)
+    if feed not in SYNC_DATASETS:
+        return error_response(f"Unknown feed {feed}; available: {', '.join(SYNC_DATASETS)}", 404)
+    
+    limit = min(max(request.args.get('limit', SYNC_PAGE_SIZE, type=int), 1), MAX_SYNC_PAGE_SIZE)
+    try:
+        since = parse_since(request.args['since']) if request.args.get('since') else None
+        records, cursor, has_more = fetch_page(feed, since, request.args.get('cursor', ''), limit)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    return success_response({'records': records, 'cursor': cursor, 'has_more': has_more})
+
+@api_bp.route('/sync/<feed>', methods=['GET'])
+@login_required
+def get_sync_changes(feed):
+    """Rows of ``feed`` (students, grades, attendance, enrollments, fees) changed since a watermark.
+
+    Start with ``?since=<ISO timestamp>`` (or nothing, for everything) and
+    keep passing the returned ``cursor`` back as ``?cursor=`` while
+    ``has_more`` is true; store the last cursor as the next sync's
+    watermark. Deletions and deactivations are in the tombstone feed.
+    """
+    return sync_page(feed, changes_page)
+
+@api_bp.route('/sync/<feed>/tombstones', methods=['GET'])
+@login_required
+def get_sync_tombstones(feed):
+    """Rows of ``feed`` deleted or deactivated since a watermark; paged like the changes feed"""
+    return sync_page(feed, tombstones_page)
@@ -1,24 +1,33 @@
 
-from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, send_file, Response
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, redirect, url_for, request, flash, jsonify, send_file
+from flask_socketio import SocketIO, emit, join_room
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from models import db, User, Student, Subject, Grade, Attendance, Enrollment, AcademicYear, Teacher, Assignment, AssignmentTemplate, SubjectTeacher, FeeStructure, FeePayment, FeeReceipt
-from forms import LoginForm, StudentForm, GradeForm, AttendanceForm, SubjectForm
+from forms import LoginForm, StudentForm, StudentImportForm, GradeForm, AttendanceForm, SubjectForm
+from attendance_rollup import apply_attendance_changes, attendance_snapshot, ensure_attendance_rollup
+from attendance_bulk import record_bulk_attendance, bulk_event_data
+from dashboard_stats import dashboard_distributions, dashboard_payload
+from stats_cache import stats_cache
+from live_counters import live_counters
+from data_version import conditional_get, ensure_data_version_table
+from student_search import apply_student_search, find_student, ensure_search_indexes
+from pagination import keyset_paginate
+from student_directory import student_directory
+from student_import import import_student_file
+from student_ids import next_student_id, sync_student_id_allocator
+from student_profile import load_student_profile
+from export_streams import STREAM_FORMATS, export_chunks, streaming_download
+from columnar_export import COLUMNAR_FORMATS, columnar_available
+from export_jobs import EXPORT_FORMATS, export_jobs, ensure_export_job_table, user_room, write_export
+from export_cache import export_cache
+from compression import response_compression
+from delta_sync import ensure_delta_sync
+from export_datasets import students_dataset, grades_dataset, attendance_dataset, enrollments_dataset, fee_payments_dataset, subjects_dataset
 from werkzeug.utils import secure_filename
 import os
-import json
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy import func, desc, case
-import io
-import csv
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -34,11 +43,33 @@ app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['WTF_CSRF_ENABLED'] = True
 app.config['WTF_CSRF_TIME_LIMIT'] = None
+# Dashboard/chart cache: 'memory' (per worker LRU) or 'sqlite' (shared local file)
+app.config['STATS_CACHE_BACKEND'] = os.getenv('STATS_CACHE_BACKEND', 'memory')
+app.config['STATS_CACHE_TTL'] = int(os.getenv('STATS_CACHE_TTL', 300))
+app.config['STATS_CACHE_PATH'] = os.getenv('STATS_CACHE_PATH')
+# Seconds between live dashboard counter reconciliations against the database
+app.config['LIVE_COUNTERS_RECONCILE_INTERVAL'] = int(os.getenv('LIVE_COUNTERS_RECONCILE_INTERVAL', 300))
+# Background export jobs: worker threads, where finished files are kept and for how long
+app.config['EXPORT_JOB_WORKERS'] = int(os.getenv('EXPORT_JOB_WORKERS', 2))
+app.config['EXPORT_ARTIFACT_DIR'] = os.getenv('EXPORT_ARTIFACT_DIR')
+app.config['EXPORT_JOB_RETENTION_HOURS'] = int(os.getenv('EXPORT_JOB_RETENTION_HOURS', 24))
+# Processes rendering large PDF reports in parallel (1 renders in the request's process)
+app.config['PDF_EXPORT_WORKERS'] = int(os.getenv('PDF_EXPORT_WORKERS', min(4, os.cpu_count() or 1)))
+# JSON responses from this size up are gzip/deflate encoded for clients that accept it (-1 disables)
+app.config['COMPRESS_MIN_BYTES'] = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+# Export download cache on local disk (0 MB disables it)
+app.config['EXPORT_CACHE_DIR'] = os.getenv('EXPORT_CACHE_DIR')
+app.config['EXPORT_CACHE_MAX_MB'] = int(os.getenv('EXPORT_CACHE_MAX_MB', 512))
 
 # Initialize extensions
 db.init_app(app)
+stats_cache.init_app(app)
 # SocketIO configuration - simplified for development
 socketio = SocketIO(app, cors_allowed_origins="*", logger=False, engineio_logger=False)
+export_jobs.init_app(app, socketio)
+export_cache.init_app(app)
+response_compression.init_app(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
@@ -204,68 +235,34 @@ def dashboard():
         return render_template('dashboard.html')
     
     # For admin/teacher users, show full dashboard with statistics
-    # Get statistics for dashboard
-    total_students = Student.query.filter_by(status='active').count()
-    total_subjects = Subject.query.count()
-    
-    # Get recent enrollments (last 30 days)
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_enrollments = Student.query.filter(Student.enrollment_date >= thirty_days_ago).count()
-    
-    # Get attendance rate for current month
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
-    # Simple approach: count total and present separately
-    total_attendance = Attendance.query.filter(
-        func.extract('month', Attendance.date) == current_month,
-        func.extract('year', Attendance.date) == current_year
-    ).count()
-    
-    present_attendance = Attendance.query.filter(
-        func.extract('month', Attendance.date) == current_month,
-        func.extract('year', Attendance.date) == current_year,
-        Attendance.status == 'present'
-    ).count()
-    
-    attendance_rate = 0
-    if total_attendance and total_attendance > 0:
-        attendance_rate = round((present_attendance / total_attendance) * 100, 1)
-    
-    # Get grade distribution
-    grade_distribution = db.session.query(
-        Grade.letter_grade,
-        func.count(Grade.id).label('count')
-    ).group_by(Grade.letter_grade).all()
-
+    stats = stats_cache.get_or_compute('dashboard_payload', dashboard_payload)
+    overview = stats['overview']
+    
     return render_template('dashboard/index.html', 
-                         total_students=total_students,
-                         total_subjects=total_subjects,
-                         recent_enrollments=recent_enrollments,
-                         attendance_rate=attendance_rate,
-                         grade_distribution=grade_distribution)
+                         total_students=overview['total_students'],
+                         total_subjects=overview['total_subjects'],
+                         recent_enrollments=overview['recent_enrollments'],
+                         attendance_rate=overview['attendance_rate'],
+                         grade_distribution=stats['grade_distribution'])
 
 # Student Management Routes
 @app.route('/students')
 @login_required
 @teacher_or_admin_required
 def students():
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     search = request.args.get('search', '', type=str)
     grade_filter = request.args.get('grade', '', type=str)
     status_filter = request.args.get('status', 'active', type=str)
+    # Exact total unless the approximate one is asked for (?count=estimated)
+    count_param = 'estimated' if request.args.get('count') == 'estimated' else None
     
     # Teachers can view all students, admins can see all students  
     # (editing restrictions are handled at the route level)
     query = Student.query
     
     if search:
-        query = query.filter(
-            (Student.first_name.contains(search)) |
-            (Student.last_name.contains(search)) |
-            (Student.email.contains(search)) |
-            (Student.student_id.contains(search))
-        )
+        query = apply_student_search(query, search, rank=False)
     
     if grade_filter:
         query = query.filter(Student.grade_level == grade_filter)
@@ -273,20 +270,24 @@ def students():
     if status_filter:
         query = query.filter(Student.status == status_filter)
     
-    students_pagination = query.order_by(Student.last_name, Student.first_name).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    # Cursor pagination over idx_student_name
+    try:
+        students_page = keyset_paginate(query, (Student.last_name, Student.first_name, Student.id),
+                                        cursor=cursor, per_page=20, count=count_param or 'exact')
+    except ValueError:
+        return redirect(url_for('students', search=search, grade=grade_filter, status=status_filter, count=count_param))
     
     # Get unique grade levels for filter
     grade_levels = db.session.query(Student.grade_level).distinct().all()
     grade_levels = [g[0] for g in grade_levels if g[0]]
     
     return render_template('students/list.html', 
-                         students=students_pagination.items,
-                         pagination=students_pagination,
+                         students=students_page.items,
+                         pagination=students_page,
                          search=search,
                          grade_filter=grade_filter,
                          status_filter=status_filter,
+                         count_param=count_param,
                          grade_levels=grade_levels)
 
 @app.route('/students/add', methods=['GET', 'POST'])
@@ -296,9 +297,7 @@ def add_student():
     form = StudentForm()
     if form.validate_on_submit():
         # Generate unique student ID
-        last_student = Student.query.order_by(desc(Student.id)).first()
-        next_id = (last_student.id + 1) if last_student else 1
-        student_id = f"STU{next_id:06d}"
+        student_id = next_student_id()
         
         student = Student(
             student_id=student_id,
@@ -337,37 +336,49 @@ def add_student():
     
     return render_template('students/form.html', form=form, title='Add Student')
 
+@app.route('/students/import', methods=['GET', 'POST'])
+@login_required
+@teacher_or_admin_required
+def import_students():
+    form = StudentImportForm()
+    result = None
+    if form.validate_on_submit():
+        upload = form.file.data
+        try:
+            result = import_student_file(upload.stream, upload.filename, dry_run=form.dry_run.data)
+        except ValueError as e:
+            flash(f'Could not read {upload.filename}: {e}', 'error')
+        else:
+            if result.imported:
+                # One event for the whole intake rather than one per student
+                if live_counters.seeded:
+                    live_counters.reconcile()
+                broadcast_update('students_imported', {'count': result.imported})
+                flash(f'Imported {result.imported} students.', 'success')
+            if result.failed:
+                flash(f'{result.failed} rows were rejected; see the details below.', 'warning')
+    
+    return render_template('students/import.html', form=form, result=result)
+
 @app.route('/students/<int:id>')
 @login_required
 @teacher_or_admin_required
 def student_detail(id):
-    student = Student.query.get_or_404(id)
+    teacher_user_id = current_user.id if current_user.role == 'teacher' else None
+    profile = load_student_profile(id, sections=('grades', 'attendance'), teacher_user_id=teacher_user_id)
+    if profile is None:
+        abort(404)
     
     # Check if teacher can access this student
-    if current_user.role == 'teacher' and not can_teacher_access_student(current_user.id, id):
+    if not profile.teacher_can_access:
         flash('You can only view students you teach.', 'error')
         return redirect(url_for('students'))
     
-    # Get student's grades
-    grades = Grade.query.filter_by(student_id=id).join(Subject).all()
-    
-    # Get attendance records (last 30 days)
-    thirty_days_ago = datetime.now().date() - timedelta(days=30)
-    attendance = Attendance.query.filter(
-        Attendance.student_id == id,
-        Attendance.date >= thirty_days_ago
-    ).order_by(desc(Attendance.date)).all()
-    
-    # Calculate attendance rate
-    total_days = len(attendance)
-    present_days = len([a for a in attendance if a.status == 'present'])
-    attendance_rate = round((present_days / total_days * 100), 1) if total_days > 0 else 0
-    
     return render_template('students/detail.html', 
-                         student=student,
-                         grades=grades,
-                         attendance=attendance,
-                         attendance_rate=attendance_rate)
+                         student=profile.student,
+                         grades=profile.grades,
+                         attendance=profile.attendance,
+                         attendance_rate=profile.attendance_rate)
 
 @app.route('/students/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -423,336 +434,92 @@ def delete_student(id):
 @app.route('/api/dashboard/stats')
 @login_required
 @teacher_or_admin_required
+@conditional_get('student', 'subject', 'grade', 'attendance', date_sensitive=True)
 def api_dashboard_stats():
-    # Student enrollment trend (last 12 months)
-    enrollment_data = []
-    for i in range(12):
-        date = datetime.now() - timedelta(days=30*i)
-        count = Student.query.filter(
-            Student.enrollment_date <= date.date()
-        ).count()
-        enrollment_data.append({
-            'month': date.strftime('%b %Y'),
-            'count': count
-        })
-    
-    # Grade distribution
-    grade_dist = db.session.query(
-        Grade.letter_grade,
-        func.count(Grade.id).label('count')
-    ).group_by(Grade.letter_grade).all()
-    
-    grade_data = [{'grade': g[0], 'count': g[1]} for g in grade_dist if g[0]]
-    
-    # Attendance trend (last 30 days)
-    attendance_trend = []
-    for i in range(30):
-        date = datetime.now().date() - timedelta(days=i)
-        total = Attendance.query.filter(Attendance.date == date).count()
-        present = Attendance.query.filter(
-            Attendance.date == date,
-            Attendance.status == 'present'
-        ).count()
-        
-        rate = (present / total * 100) if total > 0 else 0
-        attendance_trend.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'rate': round(rate, 1)
-        })
+    stats = stats_cache.get_or_compute('dashboard_payload:30', lambda: dashboard_payload(attendance_days=30))
     
     return jsonify({
-        'enrollment_trend': list(reversed(enrollment_data)),
-        'grade_distribution': grade_data,
-        'attendance_trend': list(reversed(attendance_trend))
+        'enrollment_trend': stats['enrollment_trend'],
+        'grade_distribution': stats['grade_distribution'],
+        'attendance_trend': stats['attendance_trend']
     })
 
 @app.route('/api/students/chart-data')
 @login_required
 @teacher_or_admin_required
+@conditional_get('student')
 def api_students_chart_data():
-    # Students by grade level
-    grade_data = db.session.query(
-        Student.grade_level,
-        func.count(Student.id).label('count')
-    ).filter(Student.status == 'active').group_by(Student.grade_level).all()
-    
-    # Students by gender
-    gender_data = db.session.query(
-        Student.gender,
-        func.count(Student.id).label('count')
-    ).filter(Student.status == 'active').group_by(Student.gender).all()
+    # Students by year level and by gender (active only)
+    stats = stats_cache.get_or_compute('dashboard_distributions', dashboard_distributions)
     
     return jsonify({
-        'by_grade': [{'grade': g[0], 'count': g[1]} for g in grade_data],
-        'by_gender': [{'gender': g[0], 'count': g[1]} for g in gender_data]
+        'by_grade': stats['students_by_grade'],
+        'by_gender': stats['students_by_gender']
     })
 
 # Export Routes
+def export_response(dataset, format_type):
+    """Download response for ``dataset`` in ``format_type``, or None for an unknown format.
+
+    Every format reads the dataset's projected query through a server-side
+    cursor; CSV and JSON are streamed, Excel, Parquet/Arrow and PDF are sent
+    once built. Either way the file is kept in the export cache and sent
+    from there until a table the export reads changes.
+    """
+    if format_type in STREAM_FORMATS:
+        extension, mimetype = STREAM_FORMATS[format_type]
+    elif format_type in EXPORT_FORMATS:
+        extension, mimetype = EXPORT_FORMATS[format_type]
+    else:
+        return None
+    if format_type in COLUMNAR_FORMATS and not columnar_available():
+        return jsonify({'error': f'{format_type} export is not available (pyarrow is not installed)'}), 501
+
+    filename = f'{dataset.basename}{extension}'
+    key = export_cache.key(request.endpoint, dataset, format_type, current_user.role)
+    path = export_cache.lookup(key, extension)
+    if path is None and format_type in STREAM_FORMATS:
+        # Sent as it is written; the cached copy is kept once the client has all of it
+        chunks = export_cache.tee(key, extension, export_chunks(dataset, format_type))
+        return streaming_download(chunks, filename, mimetype)
+    if path is None:
+        path = export_cache.store(key, extension, lambda target: write_export(
+            dataset, format_type, target, pdf_workers=app.config['PDF_EXPORT_WORKERS']))
+    return send_file(path, as_attachment=True, download_name=filename, mimetype=mimetype)
+
 @app.route('/export/students')
 @login_required
 @teacher_or_admin_required
 def export_students():
     format_type = request.args.get('format', 'excel')
-    search = request.args.get('search', '')
-    grade_filter = request.args.get('grade', '')
-    status_filter = request.args.get('status', 'active')
-    student_ids = request.args.getlist('student_ids')
-    
-    # Build query
-    query = Student.query
-    
-    # Apply filters
-    if search:
-        query = query.filter(
-            db.or_(
-                Student.first_name.contains(search),
-                Student.last_name.contains(search),
-                Student.email.contains(search),
-                Student.student_id.contains(search)
-            )
-        )
-    
-    if grade_filter:
-        query = query.filter(Student.grade_level == int(grade_filter))
-    
-    if status_filter:
-        query = query.filter(Student.status == status_filter)
-    
-    # If specific student IDs are provided, filter by them
-    if student_ids:
-        query = query.filter(Student.id.in_(student_ids))
-    
-    students = query.all()
+    try:
+        dataset = students_dataset({
+            'search': request.args.get('search', ''),
+            'grade': request.args.get('grade', ''),
+            'status': request.args.get('status', 'active'),
+            'student_ids': request.args.getlist('student_ids'),
+            'since': request.args.get('since', '')
+        })
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('students'))
     
-    if not students:
+    # An empty delta is a valid answer for a sync: send the empty file
+    if not request.args.get('since') and dataset.is_empty():
         flash('No students found for export.', 'warning')
         return redirect(url_for('students'))
     
-    if format_type == 'csv':
-        # CSV export
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            'Student ID', 'First Name', 'Last Name', 'Full Name', 'Email', 
-            'Phone', 'Grade Level', 'GPA', 'Status', 'Gender', 'Date of Birth',
-            'Address', 'City', 'State', 'Zip Code', 'Enrollment Date', 
-            'Emergency Contact', 'Emergency Phone', 'Parent Email'
-        ])
-        
-        # Write data
-        for student in students:
-            writer.writerow([
-                student.student_id,
-                student.first_name,
-                student.last_name,
-                student.full_name,
-                student.email,
-                student.phone or '',
-                student.grade_level,
-                f"{student.gpa:.2f}" if student.gpa else '',
-                student.status,
-                student.gender or '',
-                student.date_of_birth.strftime('%Y-%m-%d') if student.date_of_birth else '',
-                student.address or '',
-                student.city or '',
-                student.state or '',
-                student.zip_code or '',
-                student.enrollment_date.strftime('%Y-%m-%d') if student.enrollment_date else '',
-                student.emergency_contact or '',
-                student.emergency_phone or '',
-                student.parent_email or ''
-            ])
-        
-        output.seek(0)
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={'Content-Disposition': f'attachment; filename=students_{datetime.now().strftime("%Y%m%d")}.csv'}
-        )
-        
-    elif format_type == 'excel':
-        # Excel export using openpyxl directly
-        try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Students"
-            
-            # Headers
-            headers = [
-                'Student ID', 'First Name', 'Last Name', 'Full Name', 'Email', 
-                'Phone', 'Grade Level', 'GPA', 'Status', 'Gender', 'Date of Birth',
-                'Address', 'City', 'State', 'Zip Code', 'Enrollment Date', 
-                'Emergency Contact', 'Emergency Phone', 'Parent Email'
-            ]
-            
-            # Style for headers
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Add headers
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Add data
-            for row_num, student in enumerate(students, 2):
-                data = [
-                    student.student_id,
-                    student.first_name,
-                    student.last_name,
-                    student.full_name,
-                    student.email,
-                    student.phone or '',
-                    student.grade_level,
-                    f"{student.gpa:.2f}" if student.gpa else '',
-                    student.status.title(),
-                    student.gender or '',
-                    student.date_of_birth.strftime('%Y-%m-%d') if student.date_of_birth else '',
-                    student.address or '',
-                    student.city or '',
-                    student.state or '',
-                    student.zip_code or '',
-                    student.enrollment_date.strftime('%Y-%m-%d') if student.enrollment_date else '',
-                    student.emergency_contact or '',
-                    student.emergency_phone or '',
-                    student.parent_email or ''
-                ]
-                
-                for col_num, value in enumerate(data, 1):
-                    ws.cell(row=row_num, column=col_num, value=value)
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column = [cell for cell in column]
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column[0].column_letter].width = adjusted_width
-            
-            # Save to BytesIO
-            output = io.BytesIO()
-            wb.save(output)
-            output.seek(0)
-            
-            return send_file(
-                output,
-                as_attachment=True,
-                download_name=f'students_{datetime.now().strftime("%Y%m%d")}.xlsx',
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-        except Exception as e:
-            flash(f'Error generating Excel file: {str(e)}', 'error')
-            return redirect(url_for('students'))
-    
-    elif format_type == 'pdf':
-        # PDF export
-        try:
-            output = io.BytesIO()
-            doc = SimpleDocTemplate(output, pagesize=A4)
-            story = []
-            
-            # Styles
-            styles = getSampleStyleSheet()
-            title_style = styles['Title']
-            heading_style = styles['Heading2']
-            normal_style = styles['Normal']
-            
-            # Title
-            title = Paragraph("Student List Report", title_style)
-            story.append(title)
-            story.append(Spacer(1, 20))
-            
-            # Report info
-            report_info = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}<br/>Total Students: {len(students)}", normal_style)
-            story.append(report_info)
-            story.append(Spacer(1, 20))
-            
-            # Table data
-            data = [['Student ID', 'Name', 'Email', 'Grade', 'GPA', 'Status']]
-            for student in students:
-                data.append([
-                    student.student_id,
-                    student.full_name,
-                    student.email,
-                    f"Grade {student.grade_level}",
-                    f"{student.gpa:.2f}" if student.gpa else 'N/A',
-                    student.status.title()
-                ])
-            
-            # Create table
-            table = Table(data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(table)
-            doc.build(story)
-            output.seek(0)
-            
-            return send_file(
-                output,
-                as_attachment=True,
-                download_name=f'students_{datetime.now().strftime("%Y%m%d")}.pdf',
-                mimetype='application/pdf'
-            )
-        except Exception as e:
-            flash(f'Error generating PDF file: {str(e)}', 'error')
-            return redirect(url_for('students'))
-    
-    elif format_type == 'json':
-        # JSON export
-        students_data = []
-        for student in students:
-            students_data.append({
-                'student_id': student.student_id,
-                'first_name': student.first_name,
-                'last_name': student.last_name,
-                'full_name': student.full_name,
-                'email': student.email,
-                'phone': student.phone,
-                'grade_level': student.grade_level,
-                'gpa': student.gpa,
-                'status': student.status,
-                'gender': student.gender,
-                'date_of_birth': student.date_of_birth.strftime('%Y-%m-%d') if student.date_of_birth else None,
-                'address': student.address,
-                'city': student.city,
-                'state': student.state,
-                'zip_code': student.zip_code,
-                'enrollment_date': student.enrollment_date.strftime('%Y-%m-%d') if student.enrollment_date else None,
-                'emergency_contact': student.emergency_contact,
-                'emergency_phone': student.emergency_phone,
-                'parent_email': student.parent_email
-            })
-        
-        return Response(
-            json.dumps(students_data, indent=2),
-            mimetype='application/json',
-            headers={'Content-Disposition': f'attachment; filename=students_{datetime.now().strftime("%Y%m%d")}.json'}
-        )
+    try:
+        response = export_response(dataset, format_type)
+    except Exception as e:
+        label = {'excel': 'Excel', 'pdf': 'PDF'}.get(format_type, format_type.upper())
+        flash(f'Error generating {label} file: {str(e)}', 'error')
+        return redirect(url_for('students'))
     
-    else:
+    if response is None:
         flash('Invalid export format requested.', 'error')
         return redirect(url_for('students'))
+    return response
 
 # API Routes for Reports
 @app.route('/api/students/export')
@@ -767,65 +534,10 @@ def api_export_students():
 @teacher_or_admin_required
 def api_export_subjects():
     """Export subjects data"""
-    format_type = request.args.get('format', 'csv')
-    
-    subjects = Subject.query.all()
-    
-    if format_type == 'csv':
-        import csv
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Faculty ID', 'Faculty Name', 'Faculty Code', 'Description', 'Total Students', 'Department', 'Active'])
-        
-        # Write data
-        for subject in subjects:
-            # Count enrolled students
-            enrolled_count = Enrollment.query.filter_by(subject_id=subject.id, status='enrolled').count()
-            
-            writer.writerow([
-                subject.id,
-                subject.name,
-                subject.code or 'N/A',
-                subject.description or 'N/A',
-                enrolled_count,
-                subject.department or 'N/A',
-                'Yes' if subject.is_active else 'No'
-            ])
-        
-        output.seek(0)
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={'Content-Disposition': f'attachment; filename=facultyreport_{datetime.now().strftime("%Y%m%d")}.csv'}
-        )
-    
-    elif format_type == 'json':
-        subjects_data = []
-        for subject in subjects:
-            # Count enrolled students
-            enrolled_count = Enrollment.query.filter_by(subject_id=subject.id, status='enrolled').count()
-            
-            subjects_data.append({
-                'id': subject.id,
-                'faculty_name': subject.name,
-                'faculty_code': subject.code,
-                'description': subject.description,
-                'total_students': enrolled_count,
-                'department': subject.department,
-                'is_active': subject.is_active
-            })
-        
-        return Response(
-            json.dumps(subjects_data, indent=2),
-            mimetype='application/json',
-            headers={'Content-Disposition': f'attachment; filename=facultyreport_{datetime.now().strftime("%Y%m%d")}.json'}
-        )
-    
-    else:
+    response = export_response(subjects_dataset(), request.args.get('format', 'csv'))
+    if response is None:
         return jsonify({'error': 'Invalid format'}), 400
+    return response
 
 @app.route('/api/attendance/export')
 @login_required
@@ -839,127 +551,51 @@ def api_export_attendance():
 @login_required
 @teacher_or_admin_required
 def export_grades():
-    """Export grades data"""
-    format_type = request.args.get('format', 'csv')
-    
-    # Get all grades with student and subject info
-    grades = Grade.query.join(Student).join(Subject).all()
-    
-    if format_type == 'csv':
-        import csv
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Student ID', 'Student Name', 'Subject', 'Grade Value', 'Letter Grade', 'Grade Type', 'Semester', 'Date Recorded'])
-        
-        # Write data
-        for grade in grades:
-            writer.writerow([
-                grade.student.student_id,
-                grade.student.full_name,
-                grade.subject.name,
-                grade.grade_value,
-                grade.letter_grade,
-                grade.grade_type,
-                grade.semester,
-                grade.date_recorded.strftime('%Y-%m-%d') if grade.date_recorded else ''
-            ])
-        
-        output.seek(0)
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={'Content-Disposition': f'attachment; filename=grades_{datetime.now().strftime("%Y%m%d")}.csv'}
-        )
-    
-    elif format_type == 'json':
-        grades_data = []
-        for grade in grades:
-            grades_data.append({
-                'student_id': grade.student.student_id,
-                'student_name': grade.student.full_name,
-                'subject': grade.subject.name,
-                'grade_value': grade.grade_value,
-                'letter_grade': grade.letter_grade,
-                'grade_type': grade.grade_type,
-                'semester': grade.semester,
-                'date_recorded': grade.date_recorded.strftime('%Y-%m-%d') if grade.date_recorded else None
-            })
-        
-        return Response(
-            json.dumps(grades_data, indent=2),
-            mimetype='application/json',
-            headers={'Content-Disposition': f'attachment; filename=grades_{datetime.now().strftime("%Y%m%d")}.json'}
-        )
-    
-    else:
+    """Export grades data; ``since`` limits it to rows changed after that time"""
+    try:
+        dataset = grades_dataset({'since': request.args.get('since', '')})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = export_response(dataset, request.args.get('format', 'csv'))
+    if response is None:
         return jsonify({'error': 'Invalid format'}), 400
+    return response
 
 @app.route('/export/attendance')
 @app.route('/api/attendances/export')  # Alternative route for compatibility
 @login_required
 @teacher_or_admin_required
 def export_attendance():
-    """Export attendance data"""
-    format_type = request.args.get('format', 'csv')
-    
-    # Get all attendance records with student info
-    attendance_records = Attendance.query.join(Student).order_by(Attendance.date.desc()).all()
-    
-    if format_type == 'csv':
-        import csv
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Student ID', 'Student Name', 'Date', 'Status', 'Period', 'Notes'])
-        
-        # Write data
-        for record in attendance_records:
-            writer.writerow([
-                record.student.student_id,
-                record.student.full_name,
-                record.date.strftime('%Y-%m-%d'),
-                record.status,
-                record.period or '',
-                record.notes or ''
-            ])
-        
-        output.seek(0)
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={'Content-Disposition': f'attachment; filename=attendance_{datetime.now().strftime("%Y%m%d")}.csv'}
-        )
-    
-    elif format_type == 'json':
-        attendance_data = []
-        for record in attendance_records:
-            attendance_data.append({
-                'student_id': record.student.student_id,
-                'student_name': record.student.full_name,
-                'date': record.date.strftime('%Y-%m-%d'),
-                'status': record.status,
-                'period': record.period,
-                'notes': record.notes
-            })
-        
-        return Response(
-            json.dumps(attendance_data, indent=2),
-            mimetype='application/json',
-            headers={'Content-Disposition': f'attachment; filename=attendance_{datetime.now().strftime("%Y%m%d")}.json'}
-        )
-    
-    else:
+    """Export attendance data; ``since`` limits it to rows changed after that time"""
+    try:
+        dataset = attendance_dataset({'since': request.args.get('since', '')})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = export_response(dataset, request.args.get('format', 'csv'))
+    if response is None:
+        return jsonify({'error': 'Invalid format'}), 400
+    return response
+
+@app.route('/export/enrollments')
+@login_required
+@teacher_or_admin_required
+def export_enrollments():
+    """Export enrollments; ``since`` limits it to rows changed after that time"""
+    try:
+        dataset = enrollments_dataset({'since': request.args.get('since', '')})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    response = export_response(dataset, request.args.get('format', 'csv'))
+    if response is None:
         return jsonify({'error': 'Invalid format'}), 400
+    return response
 
 # SocketIO Events for Real-time Updates
 @socketio.on('connect')
 def handle_connect():
     if current_user.is_authenticated:
+        # Per-user room for events meant for this user only (export job progress)
+        join_room(user_room(current_user.id))
         emit('status', {'msg': f'{current_user.username} has connected'}, broadcast=True)
         print(f'Client connected: {current_user.username}')
 
@@ -973,19 +609,23 @@ def handle_disconnect():
 def handle_dashboard_update():
     """Client requests dashboard data update"""
     if current_user.is_authenticated:
-        # Get fresh stats
-        total_students = Student.query.filter_by(status='active').count()
-        total_subjects = Subject.query.filter_by(is_active=True).count()
+        # Served from in-memory counters kept current by broadcast_update
+        live_counters.start_reconciler(socketio, app, app.config['LIVE_COUNTERS_RECONCILE_INTERVAL'])
+        counters = live_counters.snapshot()
         
         emit('dashboard_updated', {
-            'total_students': total_students,
-            'total_subjects': total_subjects,
+            'total_students': counters['total_students'],
+            'total_subjects': counters['total_subjects'],
+            'attendance_today': counters['attendance_today'],
             'timestamp': datetime.now().isoformat()
         })
 
 # Helper function to broadcast updates
 def broadcast_update(event_name, data):
     """Broadcast an update to all connected clients"""
+    # Every broadcast reflects a data change, so cached dashboard stats are stale
+    stats_cache.invalidate()
+    live_counters.apply_event(event_name, data)
     socketio.emit(event_name, data, namespace='/')
 
 # Real-time notification functions (to be called after DB operations)
@@ -994,7 +634,8 @@ def notify_student_created(student):
         'id': student.id,
         'student_id': student.student_id,
         'name': student.full_name,
-        'grade': student.grade_level
+        'grade': student.grade_level,
+        'status': student.status
     })
 
 def notify_student_updated(student):
@@ -1002,7 +643,8 @@ def notify_student_updated(student):
         'id': student.id,
         'student_id': student.student_id,
         'name': student.full_name,
-        'grade': student.grade_level
+        'grade': student.grade_level,
+        'status': student.status
     })
 
 def notify_student_deleted(student_id):
@@ -1028,14 +670,16 @@ def notify_subject_created(subject):
     broadcast_update('subject_created', {
         'id': subject.id,
         'name': subject.name,
-        'code': subject.code
+        'code': subject.code,
+        'is_active': subject.is_active
     })
 
 def notify_subject_updated(subject):
     broadcast_update('subject_updated', {
         'id': subject.id,
         'name': subject.name,
-        'code': subject.code
+        'code': subject.code,
+        'is_active': subject.is_active
     })
 
 # Subject Management Routes
@@ -1045,33 +689,12 @@ def notify_subject_updated(subject):
 def subjects():
     subjects = Subject.query.filter_by(is_active=True).all()
     
-    # Calculate enrolled students for each faculty
-    faculty_enrollments = []
-    for subject in subjects:
-        # Count students based on their grades (students who have grades in this faculty)
-        enrolled_count = db.session.query(Student.id).join(Grade).filter(
-            Grade.subject_id == subject.id,
-            Student.status == 'active'
-        ).distinct().count()
-        
-        # Also count students by faculty assignment in sample data
-        # For BSC-CSIT faculty
-        if subject.code == 'BSC-CSIT':
-            enrolled_count = Student.query.filter(
-                Student.status == 'active',
-                Student.student_id.in_(['STU000001', 'STU000003', 'STU000005', 'STU000007', 'STU000009'])
-            ).count()
-        # For BCA faculty
-        elif subject.code == 'BCA':
-            enrolled_count = Student.query.filter(
-                Student.status == 'active',
-                Student.student_id.in_(['STU000002', 'STU000004', 'STU000006', 'STU000008', 'STU000010'])
-            ).count()
-        
-        faculty_enrollments.append({
-            'subject': subject,
-            'enrolled_students': enrolled_count
-        })
+    # Enrolled students of every faculty from one grouped query
+    enrolled = Subject.enrolled_counts()
+    faculty_enrollments = [{
+        'subject': subject,
+        'enrolled_students': enrolled.get(subject.id, 0)
+    } for subject in subjects]
     
     return render_template('subjects/list.html', faculty_enrollments=faculty_enrollments)
 
@@ -1123,6 +746,7 @@ def delete_subject(id):
     subject.updated_at = datetime.utcnow()
     db.session.commit()
     
+    notify_subject_updated(subject)
     flash('Subject deleted successfully!', 'success')
     return redirect(url_for('subjects'))
 
@@ -1148,13 +772,9 @@ def attendance():
 def record_attendance():
     form = AttendanceForm()
     
-    # For teachers, restrict to students they teach
-    if current_user.role == 'teacher':
-        teacher_students = get_teacher_students(current_user.id)
-        form.student_id.choices = [(s.id, s.full_name) for s in teacher_students]
-    else:
-        # Admin can record attendance for all students
-        form.student_id.choices = [(s.id, s.full_name) for s in Student.query.filter_by(status='active').all()]
+    # For teachers, restrict to students they teach; admin sees all active students
+    teacher_user_id = current_user.id if current_user.role == 'teacher' else None
+    form.student_scope = student_directory.students(teacher_user_id)
     
     if form.validate_on_submit():
         # Additional check for teachers
@@ -1184,6 +804,7 @@ def record_attendance():
             recorded_by=current_user.id
         )
         db.session.add(attendance)
+        apply_attendance_changes(added=[attendance])
         db.session.commit()
         
         notify_attendance_recorded(attendance)
@@ -1206,13 +827,9 @@ def edit_attendance(attendance_id):
     
     form = AttendanceForm(obj=attendance)
     
-    # For teachers, restrict to students they teach
-    if current_user.role == 'teacher':
-        teacher_students = get_teacher_students(current_user.id)
-        form.student_id.choices = [(s.id, s.full_name) for s in teacher_students]
-    else:
-        # Admin can edit attendance for all students
-        form.student_id.choices = [(s.id, s.full_name) for s in Student.query.filter_by(status='active').all()]
+    # For teachers, restrict to students they teach; admin sees all active students
+    teacher_user_id = current_user.id if current_user.role == 'teacher' else None
+    form.student_scope = student_directory.students(teacher_user_id)
     
     if form.validate_on_submit():
         # Additional check for teachers
@@ -1221,10 +838,13 @@ def edit_attendance(attendance_id):
                 flash('You can only edit attendance for students you teach.', 'error')
                 return redirect(url_for('attendance'))
         
+        before = attendance_snapshot(attendance)
         form.populate_obj(attendance)
         attendance.updated_at = datetime.utcnow()
+        apply_attendance_changes(added=[attendance], removed=[before])
         
         db.session.commit()
+        stats_cache.invalidate()
         
         flash('Attendance updated successfully!', 'success')
         return redirect(url_for('attendance'))
@@ -1236,34 +856,22 @@ def edit_attendance(attendance_id):
 @teacher_or_admin_required
 def bulk_attendance():
     if request.method == 'POST':
-        date = request.form.get('date')
-        students = Student.query.filter_by(status='active').all()
-        
-        for student in students:
-            status = request.form.get(f'status_{student.id}')
-            if status:
-                # Determine period based on student's faculty
-                # Get student's enrolled faculty to determine period
-                enrollment = Enrollment.query.filter_by(student_id=student.id).first()
-                if enrollment and enrollment.subject:
-                    if enrollment.subject.code == 'BCA':
-                        period = 'morning'
-                    else:  # BSC-CSIT
-                        period = 'day'
-                else:
-                    # Default fallback if no enrollment found
-                    period = 'morning'
-                
-                attendance = Attendance(
-                    student_id=student.id,
-                    date=datetime.strptime(date, '%Y-%m-%d').date(),
-                    status=status,
-                    period=period,
-                    recorded_by=current_user.id
-                )
-                db.session.add(attendance)
-        
+        date = datetime.strptime(request.form.get('date'), '%Y-%m-%d').date()
+        statuses = {
+            int(key[len('status_'):]): value for key, value in request.form.items()
+            if key.startswith('status_') and key[len('status_'):].isdigit() and value
+        }
+        # Only active students are on the roll; periods follow each student's faculty
+        active_ids = [id for (id,) in db.session.query(Student.id).filter(
+            Student.status == 'active', Student.id.in_(list(statuses))
+        )] if statuses else []
+        rows = record_bulk_attendance([
+            {'student_id': student_id, 'date': date, 'status': statuses[student_id]} for student_id in active_ids
+        ], recorded_by=current_user.id)
         db.session.commit()
+        
+        if rows:
+            broadcast_update('attendance_recorded', bulk_event_data(rows))
         flash('Bulk attendance recorded successfully!', 'success')
         return redirect(url_for('attendance'))
     
@@ -1335,23 +943,10 @@ def add_grade():
     if not form.academic_year.data:
         form.academic_year.data = '2024-25'
     
-    # For teachers, restrict to students they teach and subjects they teach
-    if current_user.role == 'teacher':
-        teacher_students = get_teacher_students(current_user.id)
-        form.student_id.choices = [(s.id, s.full_name) for s in teacher_students]
-        
-        # Get subjects that this teacher teaches
-        teacher = Teacher.query.filter_by(user_id=current_user.id).first()
-        if teacher:
-            teacher_subject_ids = db.session.query(SubjectTeacher.subject_id).filter_by(teacher_id=teacher.id).subquery()
-            teacher_subjects = Subject.query.filter(Subject.id.in_(teacher_subject_ids), Subject.is_active == True).all()
-            form.subject_id.choices = [(s.id, s.name) for s in teacher_subjects]
-        else:
-            form.subject_id.choices = []
-    else:
-        # Admin can access all students and subjects
-        form.student_id.choices = [(s.id, s.full_name) for s in Student.query.filter_by(status='active').all()]
-        form.subject_id.choices = [(s.id, s.name) for s in Subject.query.filter_by(is_active=True).all()]
+    # For teachers, restrict to students and subjects they teach; admin sees all active ones
+    teacher_user_id = current_user.id if current_user.role == 'teacher' else None
+    form.student_scope = student_directory.students(teacher_user_id)
+    form.subject_id.choices = student_directory.subject_choices(teacher_user_id)
     
     if form.validate_on_submit():
         # Additional check for teachers
@@ -1384,6 +979,7 @@ def add_grade():
                 student.gpa = student.calculate_gpa()
                 db.session.commit()
             
+            notify_grade_added(grade)
             flash('Grade added successfully!', 'success')
             return redirect(url_for('grades'))
         except Exception as e:
@@ -1407,23 +1003,10 @@ def edit_grade(grade_id):
     
     form = GradeForm(obj=grade)
     
-    # For teachers, restrict to students they teach and subjects they teach
-    if current_user.role == 'teacher':
-        teacher_students = get_teacher_students(current_user.id)
-        form.student_id.choices = [(s.id, s.full_name) for s in teacher_students]
-        
-        # Get subjects that this teacher teaches
-        teacher = Teacher.query.filter_by(user_id=current_user.id).first()
-        if teacher:
-            teacher_subject_ids = db.session.query(SubjectTeacher.subject_id).filter_by(teacher_id=teacher.id).subquery()
-            teacher_subjects = Subject.query.filter(Subject.id.in_(teacher_subject_ids), Subject.is_active == True).all()
-            form.subject_id.choices = [(s.id, s.name) for s in teacher_subjects]
-        else:
-            form.subject_id.choices = []
-    else:
-        # Admin can access all students and subjects
-        form.student_id.choices = [(s.id, s.full_name) for s in Student.query.filter_by(status='active').all()]
-        form.subject_id.choices = [(s.id, s.name) for s in Subject.query.filter_by(is_active=True).all()]
+    # For teachers, restrict to students and subjects they teach; admin sees all active ones
+    teacher_user_id = current_user.id if current_user.role == 'teacher' else None
+    form.student_scope = student_directory.students(teacher_user_id)
+    form.subject_id.choices = student_directory.subject_choices(teacher_user_id)
     
     if form.validate_on_submit():
         # Additional check for teachers
@@ -1444,6 +1027,7 @@ def edit_grade(grade_id):
             student.gpa = student.calculate_gpa()
             db.session.commit()
         
+        stats_cache.invalidate()
         flash('Grade updated successfully!', 'success')
         return redirect(url_for('grades'))
     
@@ -1533,19 +1117,7 @@ def student_search_profile():
         return redirect(url_for('student_profile'))
     
     # Search by ID or name
-    student = None
-    if search_term.startswith('STU') or search_term.isdigit():
-        student = Student.query.filter_by(student_id=search_term, status='active').first()
-    else:
-        # Search by name - need to check first_name and last_name separately since full_name is a property
-        student = Student.query.filter(
-            db.or_(
-                Student.first_name.ilike(f'%{search_term}%'),
-                Student.last_name.ilike(f'%{search_term}%'),
-                db.func.concat(Student.first_name, ' ', Student.last_name).ilike(f'%{search_term}%')
-            ),
-            Student.status == 'active'
-        ).first()
+    student = find_student(search_term)
     
     if not student:
         flash('Student not found. Please check your name or ID.', 'error')
@@ -1706,6 +1278,17 @@ def init_db():
             # Check if database is already initialized
             try:
                 if User.query.first() is not None:
+                    # Tables added after the first deployment still need creating
+                    if ensure_attendance_rollup():
+                        print("Attendance rollup table created and backfilled")
+                    if ensure_data_version_table():
+                        print("Data version table created")
+                    if ensure_export_job_table():
+                        print("Export job table created")
+                    if ensure_delta_sync():
+                        print("Tombstone table created")
+                    ensure_search_indexes()
+                    sync_student_id_allocator()
                     print("Database already initialized, skipping...")
                     return
             except Exception:
@@ -1715,6 +1298,8 @@ def init_db():
             print("Initializing database for first time...")
             # Create tables
             db.create_all()
+            ensure_search_indexes()
+            sync_student_id_allocator()
             
             # Skip data initialization in serverless environment
             if not os.getenv('VERCEL'):
@@ -1808,19 +1393,7 @@ def student_search_grades():
         return redirect(url_for('student_my_grades'))
     
     # Search by ID or name
-    student = None
-    if search_term.startswith('STU') or search_term.isdigit():
-        student = Student.query.filter_by(student_id=search_term, status='active').first()
-    else:
-        # Search by name - need to check first_name and last_name separately since full_name is a property
-        student = Student.query.filter(
-            db.or_(
-                Student.first_name.ilike(f'%{search_term}%'),
-                Student.last_name.ilike(f'%{search_term}%'),
-                db.func.concat(Student.first_name, ' ', Student.last_name).ilike(f'%{search_term}%')
-            ),
-            Student.status == 'active'
-        ).first()
+    student = find_student(search_term)
     
     if not student:
         flash('Student not found. Please check your name or ID.', 'error')
@@ -1846,19 +1419,7 @@ def student_search_attendance():
         return redirect(url_for('student_my_attendance'))
     
     # Search by ID or name
-    student = None
-    if search_term.startswith('STU') or search_term.isdigit():
-        student = Student.query.filter_by(student_id=search_term, status='active').first()
-    else:
-        # Search by name - need to check first_name and last_name separately since full_name is a property
-        student = Student.query.filter(
-            db.or_(
-                Student.first_name.ilike(f'%{search_term}%'),
-                Student.last_name.ilike(f'%{search_term}%'),
-                db.func.concat(Student.first_name, ' ', Student.last_name).ilike(f'%{search_term}%')
-            ),
-            Student.status == 'active'
-        ).first()
+    student = find_student(search_term)
     
     if not student:
         flash('Student not found. Please check your name or ID.', 'error')
@@ -1899,19 +1460,7 @@ def student_search_fees():
         return redirect(url_for('student_my_fees'))
     
     # Search by ID or name
-    student = None
-    if search_term.startswith('STU') or search_term.isdigit():
-        student = Student.query.filter_by(student_id=search_term, status='active').first()
-    else:
-        # Search by name - need to check first_name and last_name separately since full_name is a property
-        student = Student.query.filter(
-            db.or_(
-                Student.first_name.ilike(f'%{search_term}%'),
-                Student.last_name.ilike(f'%{search_term}%'),
-                db.func.concat(Student.first_name, ' ', Student.last_name).ilike(f'%{search_term}%')
-            ),
-            Student.status == 'active'
-        ).first()
+    student = find_student(search_term)
     
     if not student:
         flash('Student not found. Please check your name or ID.', 'error')
@@ -2289,62 +1838,19 @@ def fee_reports():
 @app.route('/api/fees/export/<export_type>')
 @login_required
 def export_fee_data(export_type):
-    """Export fee data as CSV or JSON"""
+    """Export fee payments as CSV, JSON, NDJSON, Excel, Parquet, Arrow or PDF"""
     if current_user.role not in ['admin', 'teacher']:
         flash('Access denied.', 'error')
         return redirect(url_for('dashboard'))
     
-    # Get fee data based on user role
-    if current_user.role == 'teacher':
-        teacher = Teacher.query.filter_by(email=current_user.email).first()
-        if teacher:
-            assigned_students = get_teacher_students(teacher.id)
-            student_ids = [s.id for s in assigned_students]
-            fee_data = db.session.query(
-                FeePayment, Student, FeeStructure
-            ).join(Student).join(FeeStructure).filter(
-                Student.id.in_(student_ids)
-            ).all()
-        else:
-            fee_data = []
-    else:  # admin
-        fee_data = db.session.query(
-            FeePayment, Student, FeeStructure
-        ).join(Student).join(FeeStructure).all()
-    
-    # Prepare export data
-    export_data = []
-    for payment, student, fee_structure in fee_data:
-        export_data.append({
-            'student_id': student.student_id,
-            'student_name': f"{student.first_name} {student.last_name}",
-            'faculty': fee_structure.faculty.name if fee_structure.faculty else 'N/A',
-            'fee_name': fee_structure.name,
-            'fee_amount': fee_structure.amount,
-            'amount_paid': payment.amount_paid,
-            'payment_date': payment.payment_date.isoformat(),
-            'payment_method': payment.payment_method,
-            'receipt_number': payment.receipt_number,
-            'semester': fee_structure.semester,
-            'academic_year': fee_structure.academic_year
-        })
-    
-    if export_type == 'csv':
-        import csv
-        import io
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=export_data[0].keys() if export_data else [])
-        writer.writeheader()
-        writer.writerows(export_data)
-        
-        response = Response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = 'attachment; filename=fee_payments.csv'
-        return response
-    
-    elif export_type == 'json':
-        response = jsonify(export_data)
-        response.headers['Content-Disposition'] = 'attachment; filename=fee_payments.json'
+    # Teachers only get the payments of the students they teach
+    try:
+        dataset = fee_payments_dataset({'since': request.args.get('since', '')}, user=current_user)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('fee_reports'))
+    response = export_response(dataset, export_type)
+    if response is not None:
         return response
     
     flash('Invalid export format.', 'error')
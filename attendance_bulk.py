@@ -0,0 +1,74 @@
+"""
+Set-based bulk attendance for the School Management System
+A roll call is written in one round trip instead of row by row: the period
+of every student without one is resolved from their faculty enrollment in
+a single query, all rows go in as one multi-row INSERT (executemany), the
+daily rollup and data version are updated once, and callers announce the
+whole batch with one coalesced ``attendance_recorded`` event.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from models import db, Attendance, Enrollment, Subject
+from attendance_rollup import apply_attendance_changes
+from data_version import mark_data_changed
+
+# Faculty code -> period its classes are held in; other faculties attend in the day
+FACULTY_PERIODS = {'BCA': 'morning'}
+OTHER_FACULTY_PERIOD = 'day'
+# Students without an enrollment
+DEFAULT_PERIOD = 'morning'
+
+def resolve_periods(student_ids):
+    """Attendance period per student id, from each student's first enrollment, in one query"""
+    periods = {}
+    rows = db.session.query(Enrollment.student_id, Subject.code).join(
+        Subject, Subject.id == Enrollment.subject_id
+    ).filter(Enrollment.student_id.in_(list(student_ids))).order_by(Enrollment.student_id, Enrollment.id)
+    for student_id, code in rows:
+        if student_id not in periods:
+            periods[student_id] = FACULTY_PERIODS.get(code, OTHER_FACULTY_PERIOD)
+    return periods
+
+def record_bulk_attendance(records, recorded_by=None):
+    """Insert attendance ``records`` (dicts with student_id, date, status and optional period, notes).
+
+    Runs in the caller's transaction; the caller commits. Raises ValueError
+    naming the first record that lacks a student, date or status. Returns
+    the inserted rows as dicts.
+    """
+    for index, record in enumerate(records):
+        missing = [name for name in ('student_id', 'date', 'status') if not record.get(name)]
+        if missing:
+            raise ValueError(f"Record {index}: missing {', '.join(missing)}")
+    if not records:
+        return []
+
+    periods = resolve_periods({record['student_id'] for record in records if not record.get('period')})
+    now = datetime.utcnow()
+    rows = [{
+        'student_id': record['student_id'],
+        'date': record['date'],
+        'status': record['status'],
+        'period': record.get('period') or periods.get(record['student_id'], DEFAULT_PERIOD),
+        'notes': record.get('notes'),
+        'recorded_by': recorded_by,
+        'created_at': now,
+        'updated_at': now
+    } for record in records]
+
+    db.session.execute(Attendance.__table__.insert(), rows)
+    apply_attendance_changes(added=[(row['date'], row['period'], row['status']) for row in rows])
+    # Core inserts bypass the flush listener that normally does this
+    mark_data_changed([Attendance.__tablename__])
+    return rows
+
+def bulk_event_data(rows):
+    """One ``attendance_recorded`` payload for a whole batch: row count per date and status"""
+    dates = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        dates[row['date'].isoformat()][row['status']] += 1
+    return {
+        'count': len(rows),
+        'dates': {day: dict(statuses) for day, statuses in dates.items()}
+    }
@@ -0,0 +1,191 @@
+"""
+Attendance rollup for the School Management System
+Keeps AttendanceDailySummary in step with Attendance writes so trend and rate
+views read one pre-aggregated row per day instead of counting attendance rows.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import func, case, inspect
+from models import db, Attendance, AttendanceDailySummary
+
+# Attendance status -> counter column on AttendanceDailySummary
+STATUS_COLUMNS = {
+    'present': 'present_count',
+    'absent': 'absent_count',
+    'late': 'late_count',
+    'excused': 'excused_count'
+}
+
+COUNT_COLUMNS = list(STATUS_COLUMNS.values()) + ['total_count']
+
+def attendance_snapshot(attendance):
+    """Capture the rollup key of an attendance record before it is modified"""
+    return (attendance.date, attendance.period or '', attendance.status)
+
+def _as_key(item):
+    if isinstance(item, tuple):
+        return item
+    return attendance_snapshot(item)
+
+def _collect_deltas(added, removed):
+    """Fold added/removed records into per-(date, period) counter deltas"""
+    deltas = defaultdict(lambda: dict.fromkeys(COUNT_COLUMNS, 0))
+    for items, sign in ((added, 1), (removed, -1)):
+        for item in items:
+            day, period, status = _as_key(item)
+            if day is None:
+                continue
+            counts = deltas[(day, period or '')]
+            counts['total_count'] += sign
+            column = STATUS_COLUMNS.get(status)
+            if column:
+                counts[column] += sign
+    # Drop keys whose changes cancel out (e.g. an edit that kept the same status)
+    return {key: counts for key, counts in deltas.items() if any(counts.values())}
+
+def _upsert_statement(dialect_name, rows):
+    """Build a single multi-row INSERT ... ON CONFLICT statement, if supported"""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    table = AttendanceDailySummary.__table__
+    stmt = insert(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.date, table.c.period],
+        set_={column: table.c[column] + stmt.excluded[column] for column in COUNT_COLUMNS}
+    )
+
+def apply_attendance_changes(added=(), removed=()):
+    """Update the daily rollup for attendance records being written.
+
+    ``added`` and ``removed`` accept Attendance objects or snapshots taken with
+    attendance_snapshot(). An edit is expressed as removing the old snapshot and
+    adding the updated record. Runs inside the caller's transaction, so the
+    rollup commits (or rolls back) together with the attendance rows.
+    """
+    deltas = _collect_deltas(added, removed)
+    if not deltas:
+        return
+
+    rows = [
+        dict(date=day, period=period, **counts)
+        for (day, period), counts in sorted(deltas.items())
+    ]
+
+    stmt = _upsert_statement(db.session.get_bind().dialect.name, rows)
+    if stmt is not None:
+        db.session.execute(stmt)
+        return
+
+    # Generic fallback for databases without ON CONFLICT support
+    for row in rows:
+        summary = AttendanceDailySummary.query.filter_by(date=row['date'], period=row['period']).first()
+        if summary is None:
+            db.session.add(AttendanceDailySummary(**row))
+        else:
+            for column in COUNT_COLUMNS:
+                setattr(summary, column, getattr(summary, column) + row[column])
+
+def rebuild_attendance_rollup(start_date=None, end_date=None):
+    """Recompute the rollup from the attendance table (optionally for a date range)"""
+    delete_query = AttendanceDailySummary.query
+    source = db.session.query(
+        Attendance.date,
+        func.coalesce(Attendance.period, '').label('period'),
+        *[func.sum(case((Attendance.status == status, 1), else_=0)).label(column)
+          for status, column in STATUS_COLUMNS.items()],
+        func.count(Attendance.id).label('total_count')
+    )
+
+    if start_date:
+        delete_query = delete_query.filter(AttendanceDailySummary.date >= start_date)
+        source = source.filter(Attendance.date >= start_date)
+    if end_date:
+        delete_query = delete_query.filter(AttendanceDailySummary.date <= end_date)
+        source = source.filter(Attendance.date <= end_date)
+
+    source = source.group_by(Attendance.date, func.coalesce(Attendance.period, ''))
+
+    delete_query.delete(synchronize_session=False)
+    db.session.execute(
+        AttendanceDailySummary.__table__.insert().from_select(
+            ['date', 'period'] + COUNT_COLUMNS, source
+        )
+    )
+
+def ensure_attendance_rollup():
+    """Create and backfill the rollup table on databases that predate it"""
+    if inspect(db.engine).has_table(AttendanceDailySummary.__tablename__):
+        return False
+    AttendanceDailySummary.__table__.create(db.engine, checkfirst=True)
+    rebuild_attendance_rollup()
+    db.session.commit()
+    return True
+
+def _rate(present, total):
+    return round(present / total * 100, 1) if total else 0
+
+def attendance_totals(start_date, end_date, period=None):
+    """Aggregate attendance counts and present-rate over a date range in one query"""
+    query = db.session.query(
+        *[func.coalesce(func.sum(getattr(AttendanceDailySummary, column)), 0) for column in COUNT_COLUMNS]
+    ).filter(
+        AttendanceDailySummary.date >= start_date,
+        AttendanceDailySummary.date <= end_date
+    )
+    if period is not None:
+        query = query.filter(AttendanceDailySummary.period == period)
+
+    present, absent, late, excused, total = query.one()
+    return {
+        'present': present,
+        'absent': absent,
+        'late': late,
+        'excused': excused,
+        'total': total,
+        'rate': _rate(present, total)
+    }
+
+def daily_attendance(start_date, end_date, period=None):
+    """Per-day attendance counts for a date range, oldest first, zero-filled"""
+    query = db.session.query(
+        AttendanceDailySummary.date,
+        *[func.sum(getattr(AttendanceDailySummary, column)) for column in COUNT_COLUMNS]
+    ).filter(
+        AttendanceDailySummary.date >= start_date,
+        AttendanceDailySummary.date <= end_date
+    )
+    if period is not None:
+        query = query.filter(AttendanceDailySummary.period == period)
+
+    by_date = {row[0]: row[1:] for row in query.group_by(AttendanceDailySummary.date).all()}
+
+    trend = []
+    day = start_date
+    while day <= end_date:
+        present, absent, late, excused, total = by_date.get(day, (0, 0, 0, 0, 0))
+        trend.append({
+            'date': day,
+            'present': present,
+            'absent': absent,
+            'late': late,
+            'excused': excused,
+            'total': total,
+            'rate': _rate(present, total)
+        })
+        day += timedelta(days=1)
+    return trend
+
+if __name__ == '__main__':
+    from app import app
+
+    with app.app_context():
+        db.create_all()
+        rebuild_attendance_rollup()
+        db.session.commit()
+        print(f"Attendance rollup rebuilt: {AttendanceDailySummary.query.count()} day/period rows")
@@ -0,0 +1,116 @@
+"""
+Benchmark for conditional GET on the read-only JSON APIs
+Compares a full GET against a revalidation carrying the previous ETag, and
+reports the number of SQL statements and the time spent in the database.
+
+Runs against DATABASE_URL when set, otherwise a throwaway SQLite file seeded
+with synthetic data:
+    python benchmark_conditional_get.py [students] [days]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'sms_benchmark.sqlite3')
+
+from sqlalchemy import event
+from app import app
+from models import db, Student, Attendance
+from attendance_rollup import rebuild_attendance_rollup
+from stats_cache import stats_cache
+
+ENDPOINTS = [
+    '/api/stats/dashboard',
+    '/api/stats/attendance-trend?days=30',
+    '/api/students?per_page=50',
+    '/api/grades',
+    '/api/dashboard/stats',
+    '/api/students/chart-data'
+]
+
+class QueryTimer:
+    """Counts SQL statements and accumulates their execution time"""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.seconds = 0.0
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        self.seconds += time.perf_counter() - conn.info['query_start'].pop()
+
+    def reset(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+def seed(students, days):
+    if Student.query.count() >= students:
+        return
+    print(f"Seeding {students} students with {days} days of attendance...")
+    today = date.today()
+    rows = [{
+        'student_id': f"BEN{i:06d}", 'first_name': f"First{i}", 'last_name': f"Last{i}",
+        'email': f"bench{i}@example.com", 'date_of_birth': date(2004, 1, 1), 'gender': 'other',
+        'grade_level': '1st Year', 'status': 'active', 'enrollment_date': today - timedelta(days=i % 365),
+        'created_at': datetime.utcnow(), 'updated_at': datetime.utcnow()
+    } for i in range(students)]
+    db.session.execute(Student.__table__.insert(), rows)
+    ids = [row[0] for row in db.session.query(Student.id)]
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        db.session.execute(Attendance.__table__.insert(), [{
+            'student_id': sid, 'date': day, 'status': 'present' if sid % 10 else 'absent',
+            'period': 'morning', 'created_at': datetime.utcnow(), 'updated_at': datetime.utcnow()
+        } for sid in ids])
+    rebuild_attendance_rollup()
+    db.session.commit()
+
+def run(students=2000, days=60, repeat=20):
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        seed(students, days)
+        timer = QueryTimer(db.engine)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+    print(f"{'endpoint':42} {'full ms':>9} {'full SQL':>9} {'full DB ms':>11} {'304 ms':>8} {'304 SQL':>8} {'304 DB ms':>10}")
+    for url in ENDPOINTS:
+        full = [0.0, 0, 0.0]
+        cond = [0.0, 0, 0.0]
+        etag = None
+        for _ in range(repeat):
+            # Measure the uncached cost, as seen after the stats cache TTL expires
+            stats_cache.invalidate()
+            timer.reset()
+            started = time.perf_counter()
+            response = client.get(url)
+            full[0] += time.perf_counter() - started
+            full[1] += timer.statements
+            full[2] += timer.seconds
+            etag = response.headers.get('ETag')
+
+            timer.reset()
+            started = time.perf_counter()
+            response = client.get(url, headers={'If-None-Match': etag} if etag else {})
+            cond[0] += time.perf_counter() - started
+            cond[1] += timer.statements
+            cond[2] += timer.seconds
+            if response.status_code != 304:
+                print(f"  warning: {url} returned {response.status_code} on revalidation")
+
+        print(f"{url:42} {full[0] / repeat * 1000:9.2f} {full[1] / repeat:9.1f} {full[2] / repeat * 1000:11.2f} "
+              f"{cond[0] / repeat * 1000:8.2f} {cond[1] / repeat:8.1f} {cond[2] / repeat * 1000:10.2f}")
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    run(*args)
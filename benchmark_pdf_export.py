@@ -0,0 +1,81 @@
+"""
+Benchmark for PDF report rendering
+Renders a synthetic student report of each requested size three ways and
+prints the time and output size of each:
+- legacy:   every row in one Table, built in-process (the original export)
+- pages:    page-sized tables, built in-process
+- parallel: page-sized tables rendered in parts by the process pool
+
+No database is needed:
+    python benchmark_pdf_export.py [rows ...] [--workers N] [--no-legacy]
+Defaults to 10000 and 50000 rows. The legacy run at 50000 rows takes a while.
+"""
+
+import io
+import os
+import sys
+import time
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+import pdf_export
+from pdf_export import TABLE_STYLE, write_table_pdf
+
+HEADER = ['Student ID', 'Name', 'Email', 'Grade', 'GPA', 'Status']
+
+def synthetic_rows(count):
+    return [[
+        f"STU{i:06d}",
+        f"First{i} Last{i}",
+        f"student{i}@example.com",
+        f"Grade {i % 4 + 1}",
+        f"{2 + (i % 200) / 100:.2f}",
+        'Active'
+    ] for i in range(count)]
+
+def render_legacy(rows):
+    output = io.BytesIO()
+    title_style, normal_style = pdf_export._paragraph_styles()
+    table = Table([HEADER] + rows)
+    table.setStyle(TABLE_STYLE)
+    story = [Paragraph("Student List Report", title_style), Spacer(1, 20),
+             Paragraph(f"Total Students: {len(rows)}", normal_style), Spacer(1, 20), table]
+    SimpleDocTemplate(output, pagesize=A4).build(story)
+    return output
+
+def render(rows, workers):
+    output = io.BytesIO()
+    write_table_pdf(output, "Student List Report", HEADER, rows, 'Students', workers=workers)
+    return output
+
+def timed(label, render_fn):
+    started = time.perf_counter()
+    output = render_fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed:8.2f}s  {len(output.getvalue()) / 1024 / 1024:7.1f} MB")
+    return elapsed
+
+def run(sizes, workers, legacy=True):
+    if pdf_export.PdfWriter is None:
+        print("pypdf is not installed: the parallel run falls back to in-process rendering")
+    # Start the pool before timing so process startup is not counted
+    render(synthetic_rows(pdf_export.PARALLEL_MIN_ROWS), workers)
+
+    for size in sizes:
+        rows = synthetic_rows(size)
+        print(f"{size} rows ({workers} workers):")
+        if legacy:
+            timed('legacy', lambda: render_legacy(rows))
+        pages = timed('pages', lambda: render(rows, 1))
+        parallel = timed('parallel', lambda: render(rows, workers))
+        print(f"  parallel speedup over pages: {pages / parallel:.1f}x")
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    workers = min(4, os.cpu_count() or 1)
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+    legacy = '--no-legacy' not in args
+    sizes = [int(arg) for arg in args if not arg.startswith('--')] or [10000, 50000]
+    run(sizes, workers, legacy)
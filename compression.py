@@ -0,0 +1,87 @@
+"""
+Response compression for the School Management System
+JSON responses at or above COMPRESS_MIN_BYTES are gzip or deflate encoded
+when the client's Accept-Encoding allows it. Streamed responses (chunked
+exports) are compressed chunk by chunk as they are generated, so the body
+is never buffered; buffered responses below the threshold are left alone,
+as compressing them costs more than it saves. File downloads (send_file)
+and responses that already carry a Content-Encoding are not touched.
+A strong ETag is suffixed with the encoding ("<tag>-gzip"), since each
+content coding is a different representation of the resource.
+"""
+
+import zlib
+from flask import request
+
+# zlib window bits selecting the container of each Content-Encoding
+ENCODING_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS
+}
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson'}
+
+def compress_chunks(chunks, encoding='gzip', level=6):
+    """Compress an iterable of str/bytes chunks into ``encoding`` without buffering it"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, ENCODING_WBITS[encoding])
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        # Ends the wrapped generator (and its request context) if the client went away
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def encoded_etag(etag, encoding):
+    """The strong ETag of the ``encoding``-coded form of a response tagged ``etag``"""
+    return f'{etag}-{encoding}'
+
+def negotiate_encoding():
+    """The client's preferred encoding among those we offer, or None for identity"""
+    return request.accept_encodings.best_match(list(ENCODING_WBITS))
+
+class ResponseCompression:
+    """Compresses eligible responses of an app in an after_request hook"""
+
+    def __init__(self, min_bytes=1024, level=6):
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def init_app(self, app):
+        self.min_bytes = app.config.get('COMPRESS_MIN_BYTES', self.min_bytes)
+        self.level = app.config.get('COMPRESS_LEVEL', self.level)
+        app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        if (self.min_bytes < 0 or request.method == 'HEAD' or response.status_code != 200
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+
+        # Compressed or not, the body now depends on Accept-Encoding
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_chunks(response.response, encoding, self.level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_bytes:
+                return response
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, ENCODING_WBITS[encoding])
+            response.set_data(compressor.compress(data) + compressor.flush())
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+        return response
+
+response_compression = ResponseCompression()
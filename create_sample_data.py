@@ -3,6 +3,9 @@ Sample data creation script for the Student Management System
 """
 from app import app, db
 from models import User, Student, Subject, Grade, Attendance, AcademicYear, Enrollment, Event, FeeStructure, FeePayment, FeeReceipt
+from attendance_rollup import rebuild_attendance_rollup
+from student_search import ensure_search_indexes
+from student_ids import sync_student_id_allocator
 from datetime import datetime, date, timedelta
 import random
 
@@ -496,6 +499,13 @@ def create_sample_data():
         
         db.session.commit()
         
+        # Sample attendance is added directly, so build its daily rollup in one pass
+        rebuild_attendance_rollup()
+        db.session.commit()
+        ensure_search_indexes()
+        # Students above were given explicit IDs; continue numbering after them
+        sync_student_id_allocator()
+        
         print(f"Sample data created successfully!")
         print(f"- {len(students)} students with varied statuses:")
         print(f"  STU000001: Active, STU000002: Inactive")
@@ -0,0 +1,121 @@
+"""
+Dashboard statistics for the School Management System
+Single source for the metrics shown on the dashboard page, the dashboard JSON
+APIs and the realtime socket handler. Each payload is built in a fixed number
+of SQL round trips regardless of table size.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, literal, union_all
+from models import db, Student, Subject, Grade, AttendanceDailySummary
+from attendance_rollup import daily_attendance
+
+ENROLLMENT_TREND_MONTHS = 12
+
+def _month_bounds(today):
+    month_start = today.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return month_start, month_end
+
+def _enrollment_checkpoints(now):
+    """Cumulative-enrollment checkpoints, oldest first (one per ~30 days)"""
+    return [now - timedelta(days=30 * i) for i in reversed(range(ENROLLMENT_TREND_MONTHS))]
+
+def dashboard_overview(now=None):
+    """Headline counts and the enrollment trend in one round trip.
+
+    Student aggregates share a single scan of the student table using
+    FILTER clauses; subject and attendance figures ride along as scalar
+    subqueries (attendance from the daily rollup).
+    """
+    now = now or datetime.now()
+    today = now.date()
+    month_start, month_end = _month_bounds(today)
+    checkpoints = _enrollment_checkpoints(now)
+
+    active_subjects = select(func.count(Subject.id)).where(Subject.is_active == True).scalar_subquery()
+    in_month = (AttendanceDailySummary.date >= month_start, AttendanceDailySummary.date <= month_end)
+    month_present = select(
+        func.coalesce(func.sum(AttendanceDailySummary.present_count), 0)
+    ).where(*in_month).scalar_subquery()
+    month_total = select(
+        func.coalesce(func.sum(AttendanceDailySummary.total_count), 0)
+    ).where(*in_month).scalar_subquery()
+
+    row = db.session.query(
+        func.count(Student.id).filter(Student.status == 'active'),
+        func.count(Student.id).filter(Student.enrollment_date >= today - timedelta(days=30)),
+        func.avg(Student.gpa),
+        active_subjects,
+        month_present,
+        month_total,
+        *[func.count(Student.id).filter(Student.enrollment_date <= checkpoint.date())
+          for checkpoint in checkpoints]
+    ).select_from(Student).one()
+
+    total_students, recent_enrollments, avg_gpa, total_subjects, present, total = row[:6]
+    enrollment_counts = row[6:]
+
+    return {
+        'total_students': total_students,
+        'total_subjects': total_subjects,
+        'recent_enrollments': recent_enrollments,
+        'attendance_rate': round(present / total * 100, 1) if total else 0,
+        'average_gpa': round(avg_gpa or 0, 2),
+        'enrollment_trend': [
+            {'month': checkpoint.strftime('%b %Y'), 'count': count}
+            for checkpoint, count in zip(checkpoints, enrollment_counts)
+        ]
+    }
+
+def dashboard_distributions():
+    """Grade, year-level and gender distributions in one UNION ALL round trip"""
+    grades = select(
+        literal('grade').label('kind'),
+        Grade.letter_grade.label('key'),
+        func.count(Grade.id).label('count')
+    ).group_by(Grade.letter_grade)
+
+    levels = select(
+        literal('level').label('kind'),
+        Student.grade_level.label('key'),
+        func.count(Student.id).label('count')
+    ).where(Student.status == 'active').group_by(Student.grade_level)
+
+    genders = select(
+        literal('gender').label('kind'),
+        Student.gender.label('key'),
+        func.count(Student.id).label('count')
+    ).where(Student.status == 'active').group_by(Student.gender)
+
+    distributions = {'grade': [], 'level': [], 'gender': []}
+    for kind, key, count in db.session.execute(union_all(grades, levels, genders)):
+        distributions[kind].append((key, count))
+
+    return {
+        'grade_distribution': [{'grade': g, 'count': c} for g, c in distributions['grade'] if g],
+        'students_by_grade': [{'grade': g, 'count': c} for g, c in distributions['level']],
+        'students_by_gender': [{'gender': g, 'count': c} for g, c in distributions['gender']]
+    }
+
+def dashboard_payload(attendance_days=None, now=None):
+    """Full dashboard payload: overview, distributions and trends.
+
+    Two round trips, plus one rollup read when ``attendance_days`` is given.
+    """
+    now = now or datetime.now()
+    overview = dashboard_overview(now)
+    payload = {
+        'overview': {key: value for key, value in overview.items() if key != 'enrollment_trend'},
+        'enrollment_trend': overview['enrollment_trend']
+    }
+    payload.update(dashboard_distributions())
+
+    if attendance_days:
+        today = now.date()
+        payload['attendance_trend'] = [
+            {'date': day['date'].strftime('%Y-%m-%d'), 'rate': day['rate']}
+            for day in daily_attendance(today - timedelta(days=attendance_days - 1), today)
+        ]
+
+    return payload
@@ -0,0 +1,180 @@
+"""
+Per-table data versions and conditional GET support
+Every committed transaction bumps a change counter for the tables it wrote
+to. Read-only endpoints derive an ETag/Last-Modified from those counters,
+so a client that already holds the current data gets a 304 without the
+endpoint's queries being run. The counters are bumped after the commit in
+a short transaction of their own: bumping inside the writer's transaction
+would hold the counter's row lock until commit and serialize every writer
+of the table behind it.
+"""
+
+import hashlib
+from datetime import date, datetime, timezone
+from functools import wraps
+from flask import request, make_response
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import db, DataVersion
+from compression import ENCODING_WBITS, encoded_etag
+
+# Tables whose writes are bookkeeping rather than user-visible data
+UNTRACKED_TABLES = {'data_version', 'attendance_daily_summary', 'id_counter', 'export_job', 'tombstone'}
+# session.info key of the tables written by the session's open transaction
+PENDING_KEY = 'data_version_pending'
+
+def _bump_statement(dialect_name, table_names, now):
+    """Single INSERT ... ON CONFLICT statement incrementing each table's counter"""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    table = DataVersion.__table__
+    stmt = insert(table).values([
+        {'table_name': name, 'version': 1, 'updated_at': now} for name in sorted(table_names)
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.table_name],
+        set_={'version': table.c.version + 1, 'updated_at': stmt.excluded.updated_at}
+    )
+
+def bump_data_versions(table_names, connection=None):
+    """Increment the change counter of each table in ``table_names`` now.
+
+    Runs in its own short transaction unless ``connection`` is given. Writers
+    should use mark_data_changed() instead, which bumps once they commit.
+    """
+    table_names = set(table_names) - UNTRACKED_TABLES
+    if not table_names:
+        return
+
+    if connection is None:
+        with db.engine.begin() as connection:
+            _bump(connection, table_names)
+    else:
+        _bump(connection, table_names)
+
+def _bump(connection, table_names):
+    now = datetime.utcnow()
+    stmt = _bump_statement(connection.dialect.name, table_names, now)
+    if stmt is not None:
+        connection.execute(stmt)
+        return
+
+    table = DataVersion.__table__
+    for name in sorted(table_names):
+        updated = connection.execute(
+            table.update().where(table.c.table_name == name).values(version=table.c.version + 1, updated_at=now)
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert().values(table_name=name, version=1, updated_at=now))
+
+def mark_data_changed(table_names, session=None):
+    """Record that the open transaction wrote ``table_names``; their versions are bumped once it commits.
+
+    Core-level writes that bypass the ORM (bulk inserts, COPY) must call this
+    themselves; ORM writes are covered by the flush listener below.
+    """
+    table_names = set(table_names) - UNTRACKED_TABLES
+    if table_names:
+        info = (session or db.session).info
+        info.setdefault(PENDING_KEY, set()).update(table_names)
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_tables(session, flush_context):
+    touched = set()
+    for obj in session.new | session.deleted:
+        touched.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            touched.add(obj.__table__.name)
+    mark_data_changed(touched, session)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed_tables(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    try:
+        bump_data_versions(pending)
+    except Exception as e:
+        # The data is committed either way; cached responses expire with their TTL or the next bump
+        print(f"Warning: Could not bump data versions for {', '.join(sorted(pending))}: {e}")
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_rolled_back_tables(session, previous_transaction):
+    # A savepoint rollback keeps the outer transaction's writes pending
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
+
+def ensure_data_version_table():
+    """Create the version table on databases that predate it"""
+    if inspect(db.engine).has_table(DataVersion.__tablename__):
+        return False
+    DataVersion.__table__.create(db.engine, checkfirst=True)
+    return True
+
+def get_data_versions(table_names):
+    """Current (version, updated_at) per table in one query; unknown tables are version 0"""
+    rows = DataVersion.query.filter(DataVersion.table_name.in_(list(table_names))).all()
+    versions = {name: (0, None) for name in table_names}
+    versions.update({row.table_name: (row.version, row.updated_at) for row in rows})
+    return versions
+
+def _validators(table_names, date_sensitive):
+    versions = get_data_versions(table_names)
+
+    seed = [request.full_path, current_user.get_id() if current_user.is_authenticated else '']
+    seed += [f"{name}:{versions[name][0]}" for name in sorted(versions)]
+    if date_sensitive:
+        # Date-relative payloads (this month, last N days) change at midnight
+        seed.append(date.today().isoformat())
+    etag = hashlib.sha1('|'.join(seed).encode()).hexdigest()
+
+    stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc, microsecond=0) if stamps and not date_sensitive else None
+    return etag, last_modified
+
+def conditional_get(*table_names, date_sensitive=False):
+    """Answer GET requests with 304 Not Modified while ``table_names`` are unchanged.
+
+    The ETag covers the request path and query string, the current user (so
+    role-scoped responses never leak across users) and the version of every
+    listed table. If-None-Match may also hold the tag of a compressed copy
+    (see compression.encoded_etag). Works with views returning a Response or
+    a success_response()-style (response, status) tuple.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET':
+                return f(*args, **kwargs)
+
+            etag, last_modified = _validators(table_names, date_sensitive)
+
+            # A client that was sent a compressed body revalidates with its suffixed tag
+            tags = [etag] + [encoded_etag(etag, encoding) for encoding in ENCODING_WBITS]
+            matched = next((tag for tag in tags if tag in request.if_none_match), None)
+            not_modified = matched is not None
+            if not request.if_none_match and last_modified and request.if_modified_since:
+                not_modified = last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(matched or etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Clients may store the response but must revalidate before reuse
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
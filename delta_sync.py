@@ -0,0 +1,130 @@
+"""
+Incremental (delta) sync feeds for the School Management System
+Downstream systems (the nightly district sync) fetch only what changed:
+- changes: rows whose updated_at moved past the caller's watermark, oldest
+  change first, paged on an (updated_at, id) index
+- tombstones: rows deleted since the watermark, and rows deactivated
+  (students no longer active, dropped enrollments), recorded by a flush
+  listener in the tombstone table
+
+Each page returns a cursor holding the (updated_at, id) position of its
+last row; passing it back resumes exactly there, so an interrupted sync
+loses and repeats nothing. Rows changed in the last few seconds are held
+back until the next sync, because a transaction still in flight may commit
+with an older updated_at than rows already handed out. A row that appears
+in the changes feed after its tombstone is live again.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, tuple_
+from sqlalchemy.orm import Session
+from models import db, Student, Grade, Attendance, Enrollment, FeePayment, Tombstone
+from export_datasets import build_dataset
+from pagination import encode_cursor, decode_cursor
+
+# Sync feed -> export dataset
+SYNC_DATASETS = {
+    'students': 'students',
+    'grades': 'grades',
+    'attendance': 'attendance',
+    'enrollments': 'enrollments',
+    'fees': 'fees'
+}
+SYNC_MODELS = (Student, Grade, Attendance, Enrollment, FeePayment)
+# Table -> (status attribute, statuses that retire a row)
+DEACTIVATED_STATUSES = {
+    Student.__tablename__: ('status', {'inactive', 'graduated', 'transferred'}),
+    Enrollment.__tablename__: ('status', {'dropped'})
+}
+SYNC_PAGE_SIZE = 1000
+MAX_SYNC_PAGE_SIZE = 5000
+# Changes younger than this are left for the next sync
+SETTLE_SECONDS = 10
+
+@event.listens_for(Session, 'after_flush')
+def _record_tombstones(session, flush_context):
+    tracked = {model.__tablename__ for model in SYNC_MODELS}
+    now = datetime.utcnow()
+    records = []
+    for obj in session.deleted:
+        if obj.__table__.name in tracked:
+            records.append({'table_name': obj.__table__.name, 'record_id': obj.id, 'reason': 'deleted', 'created_at': now})
+    for obj in session.dirty:
+        table_name = obj.__table__.name
+        if table_name not in DEACTIVATED_STATUSES:
+            continue
+        attribute, retired = DEACTIVATED_STATUSES[table_name]
+        history = inspect(obj).attrs[attribute].history
+        if history.added and history.added[0] in retired and not any(old in retired for old in history.deleted):
+            records.append({'table_name': table_name, 'record_id': obj.id, 'reason': 'deactivated', 'created_at': now})
+    if records:
+        session.connection().execute(Tombstone.__table__.insert(), records)
+
+def ensure_delta_sync():
+    """Create the tombstone table and the updated_at indexes on databases that predate them"""
+    created = not inspect(db.engine).has_table(Tombstone.__tablename__)
+    Tombstone.__table__.create(db.engine, checkfirst=True)
+    for model in SYNC_MODELS:
+        for index in model.__table__.indexes:
+            if index.name.endswith('_updated'):
+                index.create(db.engine, checkfirst=True)
+    return created
+
+def _position(cursor):
+    """(updated_at, id) held by a sync cursor; raises ValueError for malformed cursors"""
+    _, values = decode_cursor(cursor)
+    try:
+        stamp, record_id = values
+        return datetime.fromisoformat(stamp), int(record_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+def _page(query, keys, since, cursor, limit):
+    """Rows of ``query`` after the cursor (or ``since``) in ``keys`` order, and the next cursor"""
+    stamp = keys[0]
+    query = query.order_by(None).filter(stamp < datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS))
+    if cursor:
+        query = query.filter(tuple_(*keys) > tuple_(*_position(cursor)))
+    elif since is not None:
+        query = query.filter(stamp > since)
+
+    rows = query.order_by(*keys).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = encode_cursor('next', [rows[-1][0].isoformat(), rows[-1][1]])
+    elif not cursor and since is not None:
+        cursor = encode_cursor('next', [since.isoformat(), 0])
+    return rows, cursor or None, has_more
+
+def changes_page(feed, since=None, cursor=None, limit=SYNC_PAGE_SIZE):
+    """One page of rows of ``feed`` changed after ``since`` or the cursor position.
+
+    Returns (records, next cursor, has_more); each record is the feed's
+    export columns plus its id and updated_at.
+    """
+    dataset = build_dataset(SYNC_DATASETS[feed])
+    model = dataset.model
+    sources, read = dataset.reader(dataset.columns)
+    keys = (model.updated_at, model.id)
+    rows, cursor, has_more = _page(dataset.query.with_entities(*keys, *sources), keys, since, cursor, limit)
+
+    keys = [column.key for column in dataset.columns]
+    records = []
+    for row in rows:
+        record = {'id': row[1], 'updated_at': row[0].isoformat()}
+        record.update(zip(keys, read(row[2:])))
+        records.append(record)
+    return records, cursor, has_more
+
+def tombstones_page(feed, since=None, cursor=None, limit=SYNC_PAGE_SIZE):
+    """One page of the rows of ``feed`` deleted or deactivated after ``since`` or the cursor position"""
+    model = build_dataset(SYNC_DATASETS[feed]).model
+    keys = (Tombstone.created_at, Tombstone.id)
+    query = db.session.query(*keys, Tombstone.record_id, Tombstone.reason).filter(
+        Tombstone.table_name == model.__tablename__
+    )
+    rows, cursor, has_more = _page(query, keys, since, cursor, limit)
+    records = [{'id': record_id, 'reason': reason, 'at': created_at.isoformat()}
+               for created_at, _, record_id, reason in rows]
+    return records, cursor, has_more
@@ -0,0 +1,157 @@
+"""
+Content-addressed export cache for the School Management System
+A finished export file is stored on local disk under a key hashed from the
+endpoint, the format, the normalized filters, the requesting role's scope
+and the data version of every table the export reads. Any write to one of
+those tables bumps its version, so a changed export gets a new key and
+stale files are never served; they simply stop being requested and age
+out. Files are evicted least recently used first once the directory grows
+past its size budget (a hit refreshes the file's mtime). Streamed formats
+are copied into the cache as they are sent and only kept if the client
+received the whole file.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import uuid
+from data_version import get_data_versions
+
+def normalize_filters(filters):
+    """Filters with empty values dropped and lists sorted, so equivalent requests share a key"""
+    normalized = {}
+    for name, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(str(item) for item in value if item not in (None, ''))
+        if value in (None, '', []):
+            continue
+        normalized[name] = value if isinstance(value, list) else str(value)
+    return normalized
+
+class ExportCache:
+    """Size-bounded LRU directory of export files keyed by content address"""
+
+    def __init__(self, directory=None, max_bytes=512 * 1024 * 1024):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'sms_export_cache')
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get('EXPORT_CACHE_DIR') or self.directory
+        self.max_bytes = app.config.get('EXPORT_CACHE_MAX_MB', self.max_bytes // (1024 * 1024)) * 1024 * 1024
+        self.enabled = self.max_bytes > 0
+
+    def key(self, endpoint, dataset, format_type, role):
+        """Cache key of ``dataset`` exported as ``format_type`` from ``endpoint`` for ``role``"""
+        tables = sorted(dataset.tables)
+        versions = get_data_versions(tables)
+        seed = {
+            'endpoint': endpoint,
+            'dataset': dataset.name,
+            'format': format_type,
+            'filters': normalize_filters(dataset.filters),
+            # Role-scoped datasets (a teacher's own students) are also keyed on their owner
+            'scope': [role, dataset.scope],
+            'versions': [[name, versions[name][0]] for name in tables]
+        }
+        return hashlib.sha256(json.dumps(seed, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, f'{key}{extension}')
+
+    def _partial(self, key, extension):
+        # Unique per writer: two requests may build the same export at once
+        return os.path.join(self.directory, f'{key}{extension}.{uuid.uuid4().hex}.part')
+
+    def lookup(self, key, extension):
+        """Path of the cached file, or None on a miss"""
+        if not self.enabled:
+            return None
+        path = self._path(key, extension)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, key, extension, write):
+        """Build the file with ``write(path)`` and return its path in the cache"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, extension)
+        partial = self._partial(key, extension)
+        try:
+            write(partial)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        self.evict(keep=path)
+        return path
+
+    def tee(self, key, extension, chunks):
+        """Pass ``chunks`` (text or bytes) through, keeping a copy that is cached once all were sent"""
+        if not self.enabled:
+            yield from chunks
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, extension)
+        partial = self._partial(key, extension)
+        complete = False
+        try:
+            with open(partial, 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+                    yield chunk
+            os.replace(partial, path)
+            complete = True
+        finally:
+            # Client disconnects and errors leave a partial file behind
+            if not complete and os.path.exists(partial):
+                os.remove(partial)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Remove least recently used files until the cache fits its budget; ``keep`` always stays"""
+        with self._lock:
+            try:
+                names = [name for name in os.listdir(self.directory) if not name.endswith('.part')]
+            except OSError:
+                return
+            entries = []
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError as e:
+                    print(f"Could not evict cached export {path}: {e}")
+
+    def clear(self):
+        with self._lock:
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+export_cache = ExportCache()
@@ -0,0 +1,389 @@
+"""
+Export datasets for the School Management System
+Each export is declared as a list of columns over a base query (joins,
+filters and the user's scope). A column names the SQL expressions it reads
+and how to turn them into a value, so an export compiles to one SELECT of
+exactly those expressions, read as plain tuples through a server-side
+cursor with no ORM objects or lazy relationship loads. CSV, JSON, XLSX and
+PDF writers all take their rows from the same compiled query; the export
+routes and background export jobs both build their files from these
+datasets, so an export has the same content whichever way it was produced.
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import func
+from sqlalchemy.sql.util import find_tables
+from models import db, Student, Subject, Grade, Attendance, Enrollment, FeePayment, FeeStructure, Teacher, SubjectTeacher
+from student_search import apply_student_search
+from export_streams import stream_query
+
+def _identity(value):
+    return value
+
+def _text(value):
+    return '' if value is None else value
+
+class Column:
+    """One exported column.
+
+    ``sources`` are the SQL expressions the column reads; ``value`` combines
+    them into the exported value (used as is by JSON, default: the single
+    source). ``text`` turns the value into a CSV cell and ``display`` into a
+    spreadsheet/report cell (default: the CSV text). Typed formats (Parquet,
+    Arrow) take a single-source column's raw value with its SQL type, and
+    the combined value of any other column as a string.
+    """
+
+    def __init__(self, key, label, *sources, value=None, text=None, display=None):
+        self.key = key
+        self.label = label
+        self.sources = sources
+        self.value = value or _identity
+        self.text = text or _text
+        self.display = display or self.text
+        self.typed = _identity if len(sources) == 1 else self.value
+        self.sql_type = sources[0].type if len(sources) == 1 else None
+
+def compile_columns(columns):
+    """The expressions to SELECT for ``columns`` (each once) and every column's positions in the row"""
+    sources, index, positions = [], {}, []
+    for column in columns:
+        column_positions = []
+        for source in column.sources:
+            if id(source) not in index:
+                index[id(source)] = len(sources)
+                sources.append(source)
+            column_positions.append(index[id(source)])
+        positions.append(column_positions)
+    return sources, positions
+
+class ExportDataset:
+    """Columns over a base query, plus the narrower column set of the PDF report.
+
+    The base query supplies FROM, joins, filters and ordering; its SELECT
+    list is replaced by the columns' sources when rows are read. ``model``
+    is the model with one row per exported row (delta syncs page on its
+    updated_at and id), ``filters`` are the request filters the query was
+    built from and ``scope`` names the user a role-scoped query was
+    restricted to (both key the export cache).
+    """
+
+    def __init__(self, name, title, query, columns, report_columns=None, report_title=None,
+                 count_label='Rows', filename=None, filters=None, scope=None, model=None):
+        self.name = name
+        self.title = title
+        self.query = query
+        self.columns = columns
+        self.report_columns = report_columns or columns
+        self.report_title = report_title or f'{title} Report'
+        self.count_label = count_label
+        self.filename = filename
+        self.filters = filters or {}
+        self.scope = scope
+        self.model = model
+
+    @property
+    def basename(self):
+        return self.filename or f'{self.name}_{datetime.now().strftime("%Y%m%d")}'
+
+    @property
+    def header(self):
+        return [column.label for column in self.columns]
+
+    @property
+    def report_header(self):
+        return [column.label for column in self.report_columns]
+
+    @property
+    def tables(self):
+        """Names of every table the export reads, including those in filter subqueries"""
+        sources, _ = compile_columns(self.columns + self.report_columns)
+        return {table.name for table in find_tables(self.query.with_entities(*sources).statement)}
+
+    def is_empty(self):
+        return not db.session.query(self.query.order_by(None).exists()).scalar()
+
+    def count(self):
+        return self.query.order_by(None).count()
+
+    def reader(self, columns, typed=False):
+        """The sources to SELECT for ``columns`` and a function turning such a row into their values"""
+        sources, positions = compile_columns(columns)
+        readers = [(column.typed if typed else column.value, column_positions)
+                   for column, column_positions in zip(columns, positions)]
+
+        def read(row):
+            return [value(*[row[position] for position in column_positions]) for value, column_positions in readers]
+        return sources, read
+
+    def _values(self, columns, typed=False):
+        """Per row, the value of each column, from a projected query over a server-side cursor"""
+        sources, read = self.reader(columns, typed)
+        for row in stream_query(self.query.with_entities(*sources)):
+            yield read(row)
+
+    def records(self):
+        """Rows as dicts keyed by column key (JSON)"""
+        keys = [column.key for column in self.columns]
+        return (dict(zip(keys, values)) for values in self._values(self.columns))
+
+    def typed_rows(self):
+        """Rows of typed values (Parquet, Arrow)"""
+        return self._values(self.columns, typed=True)
+
+    def rows(self):
+        """Rows as CSV cells"""
+        formats = [column.text for column in self.columns]
+        return ([fmt(value) for fmt, value in zip(formats, values)] for values in self._values(self.columns))
+
+    def display_rows(self):
+        """Rows as spreadsheet cells"""
+        formats = [column.display for column in self.columns]
+        return ([fmt(value) for fmt, value in zip(formats, values)] for values in self._values(self.columns))
+
+    def report_rows(self):
+        """Rows of the PDF report table"""
+        formats = [column.display for column in self.report_columns]
+        return ([fmt(value) for fmt, value in zip(formats, values)] for values in self._values(self.report_columns))
+
+# ==================== FORMATTERS ====================
+
+def _iso_date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+def _iso_datetime(value):
+    return value.isoformat() if value else None
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}"
+
+def _title(value):
+    return value.title() if value else ''
+
+def _gpa_text(value):
+    return f"{value:.2f}" if value else ''
+
+def _or_na(value):
+    return value or 'N/A'
+
+# ==================== DATASETS ====================
+
+def _teacher_student_ids(teacher_user_id):
+    """Subquery of the students enrolled in a subject the teacher teaches"""
+    taught = db.session.query(SubjectTeacher.subject_id).join(
+        Teacher, Teacher.id == SubjectTeacher.teacher_id
+    ).filter(Teacher.user_id == teacher_user_id)
+    return db.session.query(Enrollment.student_id).filter(
+        Enrollment.subject_id.in_(taught),
+        Enrollment.status == 'enrolled'
+    )
+
+def filter_students(query, filters):
+    """Apply the student list filters (search, grade, status, student_ids)"""
+    if filters.get('search'):
+        query = apply_student_search(query, filters['search'])
+    if filters.get('grade'):
+        query = query.filter(Student.grade_level == int(filters['grade']))
+    if filters.get('status'):
+        query = query.filter(Student.status == filters['status'])
+    if filters.get('student_ids'):
+        query = query.filter(Student.id.in_(filters['student_ids']))
+    return query
+
+def parse_since(value):
+    """UTC timestamp of a ``since`` filter (ISO 8601, naive means UTC); raises ValueError"""
+    if isinstance(value, datetime):
+        since = value
+    else:
+        value = str(value).strip()
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        try:
+            since = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid since timestamp: {value}; expected ISO 8601, e.g. 2024-01-31T18:00:00Z")
+    if since.tzinfo is not None:
+        # updated_at is stored as naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+def changed_since(query, columns, model, filters):
+    """Apply a ``since`` filter: only rows of ``model`` updated after it, oldest change first.
+
+    Delta exports also carry each row's id and update time, so a consumer
+    can upsert them and tell where to continue from.
+    """
+    if not filters.get('since'):
+        return query, columns
+    since = parse_since(filters['since'])
+    query = query.filter(model.updated_at > since).order_by(None).order_by(model.updated_at, model.id)
+    columns = [Column('id', 'ID', model.id)] + columns + [
+        Column('updated_at', 'Updated At', model.updated_at, value=_iso_datetime)
+    ]
+    return query, columns
+
+STUDENT_CODE = Column('student_id', 'Student ID', Student.student_id)
+STUDENT_NAME = Column('full_name', 'Full Name', Student.first_name, Student.last_name, value=_full_name)
+STUDENT_EMAIL = Column('email', 'Email', Student.email)
+
+STUDENT_COLUMNS = [
+    STUDENT_CODE,
+    Column('first_name', 'First Name', Student.first_name),
+    Column('last_name', 'Last Name', Student.last_name),
+    STUDENT_NAME,
+    STUDENT_EMAIL,
+    Column('phone', 'Phone', Student.phone),
+    Column('grade_level', 'Grade Level', Student.grade_level),
+    Column('gpa', 'GPA', Student.gpa, text=_gpa_text),
+    Column('status', 'Status', Student.status, display=_title),
+    Column('gender', 'Gender', Student.gender),
+    Column('date_of_birth', 'Date of Birth', Student.date_of_birth, value=_iso_date),
+    Column('address', 'Address', Student.address),
+    Column('city', 'City', Student.city),
+    Column('state', 'State', Student.state),
+    Column('zip_code', 'Zip Code', Student.zip_code),
+    Column('enrollment_date', 'Enrollment Date', Student.enrollment_date, value=_iso_date),
+    Column('emergency_contact', 'Emergency Contact', Student.emergency_contact),
+    Column('emergency_phone', 'Emergency Phone', Student.emergency_phone),
+    Column('parent_email', 'Parent Email', Student.parent_email)
+]
+
+STUDENT_REPORT_COLUMNS = [
+    STUDENT_CODE,
+    Column('full_name', 'Name', Student.first_name, Student.last_name, value=_full_name),
+    STUDENT_EMAIL,
+    Column('grade_level', 'Grade', Student.grade_level, display=lambda grade: f"Grade {grade}"),
+    Column('gpa', 'GPA', Student.gpa, display=lambda gpa: f"{gpa:.2f}" if gpa else 'N/A'),
+    Column('status', 'Status', Student.status, display=_title)
+]
+
+def students_dataset(filters, user=None):
+    query = filter_students(db.session.query(Student.id).select_from(Student), filters)
+    query, columns = changed_since(query, STUDENT_COLUMNS, Student, filters)
+    return ExportDataset(
+        'students', 'Students', query, columns,
+        report_columns=STUDENT_REPORT_COLUMNS,
+        report_title='Student List Report',
+        count_label='Students',
+        filters=filters,
+        model=Student
+    )
+
+GRADE_COLUMNS = [
+    STUDENT_CODE,
+    Column('student_name', 'Student Name', Student.first_name, Student.last_name, value=_full_name),
+    Column('subject', 'Subject', Subject.name),
+    Column('grade_value', 'Grade Value', Grade.grade_value),
+    Column('letter_grade', 'Letter Grade', Grade.letter_grade),
+    Column('grade_type', 'Grade Type', Grade.grade_type),
+    Column('semester', 'Semester', Grade.semester),
+    Column('date_recorded', 'Date Recorded', Grade.date_recorded, value=_iso_date)
+]
+
+def grades_dataset(filters=None, user=None):
+    filters = filters or {}
+    query = db.session.query(Grade.id).select_from(Grade).join(
+        Student, Student.id == Grade.student_id
+    ).join(Subject, Subject.id == Grade.subject_id)
+    query, columns = changed_since(query, GRADE_COLUMNS, Grade, filters)
+    return ExportDataset('grades', 'Grades', query, columns, count_label='Grades', filters=filters, model=Grade)
+
+ATTENDANCE_COLUMNS = [
+    STUDENT_CODE,
+    Column('student_name', 'Student Name', Student.first_name, Student.last_name, value=_full_name),
+    Column('date', 'Date', Attendance.date, value=_iso_date),
+    Column('status', 'Status', Attendance.status),
+    Column('period', 'Period', Attendance.period),
+    Column('notes', 'Notes', Attendance.notes)
+]
+
+def attendance_dataset(filters=None, user=None):
+    filters = filters or {}
+    query = db.session.query(Attendance.id).select_from(Attendance).join(
+        Student, Student.id == Attendance.student_id
+    ).order_by(Attendance.date.desc())
+    query, columns = changed_since(query, ATTENDANCE_COLUMNS, Attendance, filters)
+    return ExportDataset('attendance', 'Attendance', query, columns, count_label='Records',
+                         filters=filters, model=Attendance)
+
+ENROLLMENT_COLUMNS = [
+    STUDENT_CODE,
+    Column('student_name', 'Student Name', Student.first_name, Student.last_name, value=_full_name),
+    Column('subject_code', 'Subject Code', Subject.code),
+    Column('subject', 'Subject', Subject.name),
+    Column('semester', 'Semester', Enrollment.semester),
+    Column('academic_year', 'Academic Year', Enrollment.academic_year),
+    Column('status', 'Status', Enrollment.status),
+    Column('enrollment_date', 'Enrollment Date', Enrollment.enrollment_date, value=_iso_date),
+    Column('completion_date', 'Completion Date', Enrollment.completion_date, value=_iso_date),
+    Column('final_grade', 'Final Grade', Enrollment.final_grade)
+]
+
+def enrollments_dataset(filters=None, user=None):
+    filters = filters or {}
+    query = db.session.query(Enrollment.id).select_from(Enrollment).join(
+        Student, Student.id == Enrollment.student_id
+    ).join(Subject, Subject.id == Enrollment.subject_id).order_by(Enrollment.id)
+    query, columns = changed_since(query, ENROLLMENT_COLUMNS, Enrollment, filters)
+    return ExportDataset('enrollments', 'Enrollments', query, columns, count_label='Enrollments',
+                         filters=filters, model=Enrollment)
+
+FEE_PAYMENT_COLUMNS = [
+    Column('student_id', 'student_id', Student.student_id),
+    Column('student_name', 'student_name', Student.first_name, Student.last_name, value=_full_name),
+    Column('faculty', 'faculty', Subject.name, value=_or_na),
+    Column('fee_name', 'fee_name', FeeStructure.name),
+    Column('fee_amount', 'fee_amount', FeeStructure.amount),
+    Column('amount_paid', 'amount_paid', FeePayment.amount_paid),
+    Column('payment_date', 'payment_date', FeePayment.payment_date, value=_iso_date),
+    Column('payment_method', 'payment_method', FeePayment.payment_method),
+    Column('receipt_number', 'receipt_number', FeePayment.receipt_number),
+    Column('semester', 'semester', FeeStructure.semester),
+    Column('academic_year', 'academic_year', FeeStructure.academic_year)
+]
+
+def fee_payments_dataset(filters=None, user=None):
+    """Fee payments; teachers only get the payments of students they teach"""
+    filters = filters or {}
+    query = db.session.query(FeePayment.id).select_from(FeePayment).join(
+        Student, Student.id == FeePayment.student_id
+    ).join(
+        FeeStructure, FeeStructure.id == FeePayment.fee_structure_id
+    ).outerjoin(Subject, Subject.id == FeeStructure.faculty_id)
+    scope = None
+    if user is not None and user.role == 'teacher':
+        query = query.filter(Student.id.in_(_teacher_student_ids(user.id)))
+        scope = user.id
+    query, columns = changed_since(query, FEE_PAYMENT_COLUMNS, FeePayment, filters)
+    return ExportDataset('fee_payments', 'Fee Payments', query, columns, count_label='Payments',
+                         filename='fee_payments', filters=filters, scope=scope, model=FeePayment)
+
+def subjects_dataset(filters=None, user=None):
+    """Subjects (faculties) with their enrolled student counts from one grouped subquery"""
+    enrolled = Subject.enrolled_counts_query().subquery()
+    query = db.session.query(Subject.id).select_from(Subject).outerjoin(enrolled, enrolled.c.subject_id == Subject.id).order_by(Subject.id)
+    columns = [
+        Column('id', 'Faculty ID', Subject.id),
+        Column('faculty_name', 'Faculty Name', Subject.name),
+        Column('faculty_code', 'Faculty Code', Subject.code, text=_or_na),
+        Column('description', 'Description', Subject.description, text=_or_na),
+        Column('total_students', 'Total Students', func.coalesce(enrolled.c.total, 0)),
+        Column('department', 'Department', Subject.department, text=_or_na),
+        Column('is_active', 'Active', Subject.is_active, text=lambda active: 'Yes' if active else 'No')
+    ]
+    return ExportDataset('facultyreport', 'Faculties', query, columns, count_label='Faculties')
+
+DATASETS = {
+    'students': students_dataset,
+    'grades': grades_dataset,
+    'attendance': attendance_dataset,
+    'enrollments': enrollments_dataset,
+    'fees': fee_payments_dataset,
+    'subjects': subjects_dataset
+}
+
+def build_dataset(name, filters=None, user=None):
+    """The named dataset with ``filters`` applied; raises ValueError for unknown names"""
+    if name not in DATASETS:
+        raise ValueError(f"Unknown export dataset: {name}")
+    return DATASETS[name](filters or {}, user)
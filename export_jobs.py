@@ -0,0 +1,233 @@
+"""
+Background export jobs for the School Management System
+Large Excel/PDF/CSV exports are submitted as jobs instead of being built
+inside the request. A bounded thread pool works through them; status and
+row progress are kept in the export_job table for polling, the finished
+file is written to a local artifact directory, and the job's owner is sent
+``export_job_updated`` events over the realtime socket (in a per-user room)
+as rows are written and when the file is ready or the job failed.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import inspect
+from models import db, User, ExportJob
+from export_datasets import DATASETS, build_dataset
+from export_streams import csv_chunks
+from xlsx_export import XLSX_MIMETYPE, write_xlsx
+from pdf_export import PDF_MIMETYPE, write_table_pdf
+from columnar_export import COLUMNAR_FORMATS, columnar_available, write_columnar
+
+# format -> (file extension, mimetype)
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'excel': ('.xlsx', XLSX_MIMETYPE),
+    'pdf': ('.pdf', PDF_MIMETYPE),
+    **COLUMNAR_FORMATS
+}
+ACTIVE_STATUSES = ('queued', 'running')
+# Rows written between progress updates
+PROGRESS_EVERY = 1000
+
+def user_room(user_id):
+    """Socket room holding every connection of one user"""
+    return f'user_{user_id}'
+
+def ensure_export_job_table():
+    """Create the job table on databases that predate it"""
+    if inspect(db.engine).has_table(ExportJob.__tablename__):
+        return False
+    ExportJob.__table__.create(db.engine, checkfirst=True)
+    return True
+
+def write_export(dataset, format_type, path, track=None, pdf_workers=1):
+    """Write ``dataset`` as ``format_type`` to ``path``; ``track`` wraps the row iterator"""
+    track = track or (lambda rows: rows)
+    if format_type == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as output:
+            for chunk in csv_chunks(dataset.header, track(dataset.rows())):
+                output.write(chunk)
+    elif format_type == 'excel':
+        write_xlsx(path, dataset.title, dataset.header, track(dataset.display_rows()))
+    elif format_type == 'pdf':
+        write_table_pdf(path, dataset.report_title, dataset.report_header,
+                        track(dataset.report_rows()), dataset.count_label, workers=pdf_workers)
+    elif format_type in COLUMNAR_FORMATS:
+        write_columnar(path, dataset, format_type, track(dataset.typed_rows()))
+    else:
+        raise ValueError(f"Unsupported export format: {format_type}")
+
+class ExportJobQueue:
+    """Submits export jobs to a bounded worker pool and tracks them in export_job"""
+
+    def __init__(self, max_workers=2, max_active_per_user=3, retention_hours=24):
+        self.max_workers = max_workers
+        self.pdf_workers = 1
+        self.max_active_per_user = max_active_per_user
+        self.retention = timedelta(hours=retention_hours)
+        self.artifact_dir = os.path.join(tempfile.gettempdir(), 'sms_exports')
+        self.app = None
+        self.socketio = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, socketio=None):
+        self.app = app
+        self.socketio = socketio
+        self.max_workers = app.config.get('EXPORT_JOB_WORKERS', self.max_workers)
+        self.pdf_workers = app.config.get('PDF_EXPORT_WORKERS', self.pdf_workers)
+        self.retention = timedelta(hours=app.config.get('EXPORT_JOB_RETENTION_HOURS', 24))
+        self.artifact_dir = app.config.get('EXPORT_ARTIFACT_DIR') or self.artifact_dir
+
+    def _pool(self):
+        # Created on first use so importing the app starts no threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='export-job')
+            return self._executor
+
+    def submit(self, user, dataset, format_type, filters=None):
+        """Queue an export for ``user``; raises ValueError for bad input or too many open jobs"""
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset {dataset}; available: {', '.join(DATASETS)}")
+        if format_type not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format {format_type}; available: {', '.join(EXPORT_FORMATS)}")
+        if format_type in COLUMNAR_FORMATS and not columnar_available():
+            raise ValueError(f"{format_type} export is not available (pyarrow is not installed)")
+        # Building the query (without running it) rejects malformed filters now rather than in the worker
+        build_dataset(dataset, filters, user)
+
+        active = ExportJob.query.filter(
+            ExportJob.user_id == user.id,
+            ExportJob.status.in_(ACTIVE_STATUSES)
+        ).count()
+        if active >= self.max_active_per_user:
+            raise ValueError(f"You already have {active} exports in progress")
+
+        self.prune()
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            user_id=user.id,
+            dataset=dataset,
+            format=format_type,
+            filters=json.dumps(filters or {})
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self._pool().submit(self._run, job.id)
+        return job
+
+    def get(self, job_id, user):
+        """The job if ``user`` owns it (admins see every job), else None"""
+        job = db.session.get(ExportJob, job_id)
+        if job is None or (job.user_id != user.id and user.role != 'admin'):
+            return None
+        return job
+
+    def recent(self, user, limit=20):
+        return ExportJob.query.filter_by(user_id=user.id).order_by(
+            ExportJob.created_at.desc()
+        ).limit(limit).all()
+
+    def artifact(self, job):
+        """Path of the finished file, or None while it is not (or no longer) available"""
+        if job.status != 'done' or not job.artifact_path or not os.path.exists(job.artifact_path):
+            return None
+        return job.artifact_path
+
+    def prune(self):
+        """Delete jobs older than the retention period together with their files"""
+        cutoff = datetime.utcnow() - self.retention
+        for job in ExportJob.query.filter(ExportJob.created_at < cutoff).all():
+            if job.artifact_path and os.path.exists(job.artifact_path):
+                try:
+                    os.remove(job.artifact_path)
+                except OSError as e:
+                    print(f"Could not remove export artifact {job.artifact_path}: {e}")
+            db.session.delete(job)
+
+    def _update(self, job_id, **values):
+        # Own transaction: the export query keeps a server-side cursor open on
+        # the session's connection, and a commit there would close it
+        table = ExportJob.__table__
+        with db.engine.begin() as connection:
+            connection.execute(table.update().where(table.c.id == job_id).values(**values))
+
+    def _emit(self, user_id, data):
+        if self.socketio is None:
+            return
+        try:
+            self.socketio.emit('export_job_updated', data, to=user_room(user_id), namespace='/')
+        except Exception as e:
+            print(f"Socket emit error: {e}")
+
+    def _notify(self, job_id):
+        db.session.expire_all()
+        job = db.session.get(ExportJob, job_id)
+        if job is not None:
+            self._emit(job.user_id, job.to_dict())
+
+    def _track(self, job, total, written):
+        """Pass rows through, recording progress every PROGRESS_EVERY rows.
+
+        The row count ends up in ``written['rows']``.
+        """
+        # Built up front: the session must not be used while the export cursor is open
+        state = job.to_dict()
+
+        def track(rows):
+            for row in rows:
+                yield row
+                written['rows'] += 1
+                done = written['rows']
+                if done % PROGRESS_EVERY == 0:
+                    self._update(job.id, rows_done=done)
+                    self._emit(job.user_id, dict(state, status='running', rows_done=done,
+                                                 progress=min(99, int(done * 100 / total)) if total else 0))
+        return track
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            try:
+                self._build(job_id)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Export job {job_id} failed: {e}")
+                self._update(job_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            finally:
+                try:
+                    self._notify(job_id)
+                finally:
+                    db.session.remove()
+
+    def _build(self, job_id):
+        job = db.session.get(ExportJob, job_id)
+        user = db.session.get(User, job.user_id)
+        dataset = build_dataset(job.dataset, json.loads(job.filters or '{}'), user)
+        extension, _ = EXPORT_FORMATS[job.format]
+
+        total = dataset.count()
+        filename = f'{dataset.basename}{extension}'
+        self._update(job_id, status='running', started_at=datetime.utcnow(), rows_total=total, filename=filename)
+        self._notify(job_id)
+
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        path = os.path.join(self.artifact_dir, f'{job_id}{extension}')
+        partial = f'{path}.part'
+        written = {'rows': 0}
+        try:
+            write_export(dataset, job.format, partial, self._track(job, total, written), self.pdf_workers)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+        self._update(job_id, status='done', rows_done=written['rows'], artifact_path=path, finished_at=datetime.utcnow())
+
+export_jobs = ExportJobQueue()
@@ -0,0 +1,124 @@
+"""
+Streaming export helpers for the School Management System
+Exports read their rows through a server-side cursor (yield_per) and send
+the file as a chunked response, flushing every few hundred rows, so worker
+memory stays flat no matter how many rows are exported. JSON exports are
+written record by record, either as one JSON array or as NDJSON (one object
+per line) for consumers that read large exports incrementally. Every
+streamed format also has a gzip variant (csv.gz, json.gz, ndjson.gz) that
+is compressed chunk by chunk as it streams.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask import Response, stream_with_context
+from compression import compress_chunks
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rows fetched per round trip from the server-side cursor
+STREAM_BATCH_SIZE = 1000
+# Rows buffered before a chunk is sent to the client
+FLUSH_ROWS = 500
+# Streamed format -> (file extension, mimetype)
+STREAM_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'json': ('.json', 'application/json'),
+    'ndjson': ('.ndjson', 'application/x-ndjson')
+}
+STREAM_FORMATS.update({
+    f'{name}.gz': (f'{extension}.gz', 'application/gzip') for name, (extension, _) in list(STREAM_FORMATS.items())
+})
+# Favours speed: the export is compressed while the client waits for it
+GZIP_EXPORT_LEVEL = 6
+
+def stream_query(query, batch_size=STREAM_BATCH_SIZE):
+    """Iterate an ORM query in batches without loading the whole result"""
+    return query.yield_per(batch_size)
+
+def csv_chunks(header, rows, flush_rows=FLUSH_ROWS):
+    """Yield CSV text in chunks of ``flush_rows`` rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % flush_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def encode_record(record):
+        return orjson.dumps(record, default=_json_default).decode()
+else:
+    # Compact separators and no indent keep the C encoder on the fast path
+    encode_record = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_json_default).encode
+
+def ndjson_chunks(records, flush_rows=FLUSH_ROWS):
+    """Yield newline-delimited JSON, one record per line, in chunks of ``flush_rows``"""
+    lines = []
+    for record in records:
+        lines.append(encode_record(record))
+        if len(lines) == flush_rows:
+            lines.append('')
+            yield '\n'.join(lines)
+            lines = []
+    if lines:
+        lines.append('')
+        yield '\n'.join(lines)
+
+def json_array_chunks(records, flush_rows=FLUSH_ROWS):
+    """Yield a single JSON array of ``records`` in chunks of ``flush_rows``"""
+    parts = ['[']
+    separator = ''
+    for count, record in enumerate(records, 1):
+        parts.append(separator)
+        parts.append(encode_record(record))
+        separator = ','
+        if count % flush_rows == 0:
+            yield ''.join(parts)
+            parts = []
+    parts.append(']')
+    yield ''.join(parts)
+
+def export_chunks(dataset, format_type):
+    """Chunks of an export dataset in one of the STREAM_FORMATS (text, or bytes when gzipped)"""
+    if format_type.endswith('.gz'):
+        return compress_chunks(export_chunks(dataset, format_type[:-len('.gz')]), 'gzip', GZIP_EXPORT_LEVEL)
+    if format_type == 'csv':
+        return csv_chunks(dataset.header, dataset.rows())
+    if format_type == 'ndjson':
+        return ndjson_chunks(dataset.records())
+    return json_array_chunks(dataset.records())
+
+def streaming_download(chunks, filename, mimetype):
+    """Chunked attachment response; the request context stays open while it streams"""
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+def stream_csv(header, rows, filename):
+    return streaming_download(csv_chunks(header, rows), filename, 'text/csv')
+
+def stream_json(records, basename, ndjson=False):
+    """Stream ``records`` as ``basename``.json (an array) or ``basename``.ndjson"""
+    if ndjson:
+        return streaming_download(ndjson_chunks(records), f'{basename}.ndjson', 'application/x-ndjson')
+    return streaming_download(json_array_chunks(records), f'{basename}.json', 'application/json')
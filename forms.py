@@ -1,7 +1,8 @@
 from flask_wtf import FlaskForm
-from flask_wtf.file import FileField, FileAllowed
-from wtforms import StringField, PasswordField, IntegerField, SubmitField, TextAreaField, SelectField, DateField, FloatField, BooleanField, TimeField
-from wtforms.validators import DataRequired, Email, Length, NumberRange, Optional
+from flask_wtf.file import FileField, FileAllowed, FileRequired
+from wtforms import Form, StringField, PasswordField, IntegerField, SubmitField, TextAreaField, SelectField, DateField, FloatField, BooleanField, TimeField
+from wtforms.validators import DataRequired, Email, Length, NumberRange, Optional, ValidationError
+from wtforms.widgets import HiddenInput
 from datetime import datetime
 
 class LoginForm(FlaskForm):
@@ -10,7 +11,8 @@ class LoginForm(FlaskForm):
     remember_me = BooleanField('Remember Me')
     submit = SubmitField('Sign In')
 
-class StudentForm(FlaskForm):
+class StudentFieldsMixin:
+    """Student fields and validation rules shared by the add/edit form and bulk import"""
     first_name = StringField('First Name', validators=[DataRequired(), Length(max=50)])
     last_name = StringField('Last Name', validators=[DataRequired(), Length(max=50)])
     email = StringField('Email', validators=[DataRequired(), Email(), Length(max=120)])
@@ -37,12 +39,25 @@ class StudentForm(FlaskForm):
         Optional(),
         NumberRange(min=datetime.now().year, max=datetime.now().year + 20)
     ])
+
+class StudentForm(StudentFieldsMixin, FlaskForm):
     photo = FileField('Student Photo', validators=[
         Optional(),
         FileAllowed(['jpg', 'jpeg', 'png', 'gif'], 'Images only!')
     ])
     submit = SubmitField('Save Student')
 
+class StudentImportRowForm(StudentFieldsMixin, Form):
+    """Validates one row of a bulk student import (no CSRF, no request context)"""
+
+class StudentImportForm(FlaskForm):
+    file = FileField('Student File (CSV or Excel)', validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'xlsx'], 'CSV or Excel (.xlsx) files only!')
+    ])
+    dry_run = BooleanField('Validate only (do not import)')
+    submit = SubmitField('Import Students')
+
 class SubjectForm(FlaskForm):
     name = StringField('Subject Name', validators=[DataRequired(), Length(max=100)])
     code = StringField('Subject Code', validators=[DataRequired(), Length(max=20)])
@@ -51,8 +66,22 @@ class SubjectForm(FlaskForm):
     department = StringField('Department', validators=[Optional(), Length(max=100)])
     submit = SubmitField('Save Subject')
 
-class GradeForm(FlaskForm):
-    student_id = SelectField('Student', coerce=int, validators=[DataRequired()])
+class StudentLookupMixin:
+    """Student picked through the /api/students/lookup typeahead.
+
+    The field carries only the student's database id. Views set
+    ``student_scope`` to the students the current user may choose (any
+    container supporting ``in``, e.g. a student directory set) and the id
+    is validated against it, instead of rendering every student as a choice.
+    """
+    student_id = IntegerField('Student', widget=HiddenInput(), validators=[DataRequired(message='Select a student.')])
+    student_scope = None
+
+    def validate_student_id(self, field):
+        if self.student_scope is not None and field.data not in self.student_scope:
+            raise ValidationError('Select a student from the search results.')
+
+class GradeForm(StudentLookupMixin, FlaskForm):
     subject_id = SelectField('Subject', coerce=int, validators=[DataRequired()])
     grade_value = FloatField('Grade (0-100)', validators=[
         DataRequired(),
@@ -90,8 +119,7 @@ class GradeForm(FlaskForm):
     comments = TextAreaField('Comments', validators=[Optional()])
     submit = SubmitField('Save Grade')
 
-class AttendanceForm(FlaskForm):
-    student_id = SelectField('Student', coerce=int, validators=[DataRequired()])
+class AttendanceForm(StudentLookupMixin, FlaskForm):
     date = DateField('Date', default=datetime.today, validators=[DataRequired()])
     status = SelectField('Status', choices=[
         ('present', 'Present'),
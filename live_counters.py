@@ -0,0 +1,142 @@
+"""
+Live dashboard counters for the realtime socket
+Seeded once from the database, then kept current by the same events that
+broadcast_update sends to clients, so socket handlers answer from memory.
+A background job periodically reconciles against the database to correct
+drift (e.g. writes made by another worker or without a realtime event).
+"""
+
+import threading
+from datetime import date, datetime
+from models import db, Student, Subject, Attendance
+
+class LiveCounters:
+    """In-memory active student/subject sets and today's attendance tally.
+
+    Active students and subjects are tracked as id sets rather than bare
+    counts, so replayed or overlapping events (e.g. a deactivation of an
+    already inactive student) cannot push the numbers out of step.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active_students = set()
+        self._active_subjects = set()
+        self._attendance_day = None
+        self._attendance_today = 0
+        self._present_today = 0
+        self.seeded = False
+        self.last_reconciled = None
+        self._reconciler_started = False
+
+    def _load(self):
+        today = date.today()
+        active_students = {row[0] for row in db.session.query(Student.id).filter(Student.status == 'active')}
+        active_subjects = {row[0] for row in db.session.query(Subject.id).filter(Subject.is_active == True)}
+        attendance_today, present_today = db.session.query(
+            db.func.count(Attendance.id),
+            db.func.count(Attendance.id).filter(Attendance.status == 'present')
+        ).filter(Attendance.date == today).one()
+        return today, active_students, active_subjects, attendance_today, present_today
+
+    def reconcile(self):
+        """Reload every counter from the database; returns the drift that was corrected"""
+        today, active_students, active_subjects, attendance_today, present_today = self._load()
+        with self._lock:
+            drift = {
+                'total_students': len(active_students) - len(self._active_students),
+                'total_subjects': len(active_subjects) - len(self._active_subjects),
+                'attendance_today': attendance_today - self._current_attendance(today)[0]
+            }
+            self._active_students = active_students
+            self._active_subjects = active_subjects
+            self._attendance_day = today
+            self._attendance_today = attendance_today
+            self._present_today = present_today
+            self.seeded = True
+            self.last_reconciled = datetime.now()
+        return drift
+
+    def _current_attendance(self, today):
+        if self._attendance_day != today:
+            return 0, 0
+        return self._attendance_today, self._present_today
+
+    def apply_event(self, event_name, data):
+        """Update counters from a realtime event payload (no database access)"""
+        if not self.seeded:
+            return
+        with self._lock:
+            if event_name == 'student_created':
+                if data.get('status', 'active') == 'active':
+                    self._active_students.add(data['id'])
+            elif event_name == 'student_updated':
+                if data.get('status') == 'active':
+                    self._active_students.add(data['id'])
+                elif data.get('status') is not None:
+                    self._active_students.discard(data['id'])
+            elif event_name == 'student_deleted':
+                self._active_students.discard(data['student_id'])
+            elif event_name in ('subject_created', 'subject_updated'):
+                if data.get('is_active', True):
+                    self._active_subjects.add(data['id'])
+                else:
+                    self._active_subjects.discard(data['id'])
+            elif event_name == 'attendance_recorded':
+                if 'dates' in data:
+                    # Coalesced bulk roll call: row counts per date and status
+                    for day, statuses in data['dates'].items():
+                        for status, count in statuses.items():
+                            self._record_attendance(day, status, count)
+                else:
+                    self._record_attendance(data.get('date'), data.get('status'), data.get('count', 1))
+
+    def _record_attendance(self, day, status, count):
+        today = date.today()
+        if day != today.isoformat():
+            return
+        if self._attendance_day != today:
+            # First event of a new day; yesterday's tally no longer applies
+            self._attendance_day = today
+            self._attendance_today = 0
+            self._present_today = 0
+        self._attendance_today += count
+        if status == 'present':
+            self._present_today += count
+
+    def snapshot(self):
+        """Current counters, seeding from the database on first use"""
+        if not self.seeded:
+            self.reconcile()
+        with self._lock:
+            attendance_today, present_today = self._current_attendance(date.today())
+            return {
+                'total_students': len(self._active_students),
+                'total_subjects': len(self._active_subjects),
+                'attendance_today': attendance_today,
+                'present_today': present_today
+            }
+
+    def start_reconciler(self, socketio, app, interval=300):
+        """Start the periodic reconciliation job once per process"""
+        with self._lock:
+            if self._reconciler_started:
+                return
+            self._reconciler_started = True
+
+        def reconcile_loop():
+            while True:
+                socketio.sleep(interval)
+                with app.app_context():
+                    try:
+                        drift = self.reconcile()
+                        if any(drift.values()):
+                            print(f"Live counters reconciled, drift corrected: {drift}")
+                    except Exception as e:
+                        print(f"Live counter reconciliation error: {e}")
+                    finally:
+                        db.session.remove()
+
+        socketio.start_background_task(reconcile_loop)
+
+live_counters = LiveCounters()
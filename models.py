@@ -2,7 +2,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime, date
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import Index
+from sqlalchemy import Index, func
 
 db = SQLAlchemy()
 
@@ -53,6 +53,7 @@ class Student(db.Model):
         Index('idx_student_name', 'last_name', 'first_name'),
         Index('idx_student_status', 'status'),
         Index('idx_student_grade', 'grade_level'),
+        Index('idx_student_updated', 'updated_at', 'id'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -201,11 +202,27 @@ class Subject(db.Model):
     teachers = db.relationship('SubjectTeacher', backref='subject', lazy='dynamic')
     assignments = db.relationship('AssignmentTemplate', backref='subject', lazy='dynamic')
     
+    @staticmethod
+    def enrolled_counts_query():
+        """(subject_id, total) of currently enrolled students, grouped by subject"""
+        return db.session.query(
+            Enrollment.subject_id, func.count(Enrollment.id).label('total')
+        ).filter(Enrollment.status == 'enrolled').group_by(Enrollment.subject_id)
+    
+    @staticmethod
+    def enrolled_counts(subject_ids=None):
+        """Enrolled student count per subject id, for every subject (or ``subject_ids``) in one query"""
+        query = Subject.enrolled_counts_query()
+        if subject_ids is not None:
+            query = query.filter(Enrollment.subject_id.in_(list(subject_ids)))
+        return dict(query.all())
+    
     def get_enrolled_count(self):
         """Get count of currently enrolled students"""
-        return self.enrollments.filter_by(status='enrolled').count()
+        return Subject.enrolled_counts([self.id]).get(self.id, 0)
     
-    def to_dict(self):
+    def to_dict(self, enrolled_count=None):
+        """``enrolled_count`` skips the count query when the caller already has it"""
         return {
             'id': self.id,
             'name': self.name,
@@ -213,7 +230,7 @@ class Subject(db.Model):
             'description': self.description,
             'credits': self.credits,
             'department': self.department,
-            'enrolled_count': self.get_enrolled_count(),
+            'enrolled_count': self.get_enrolled_count() if enrolled_count is None else enrolled_count,
             'max_students': self.max_students
         }
 
@@ -232,6 +249,7 @@ class Grade(db.Model):
     __table_args__ = (
         Index('idx_grade_student', 'student_id'),
         Index('idx_grade_subject', 'subject_id'),
+        Index('idx_grade_updated', 'updated_at', 'id'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -277,6 +295,7 @@ class Attendance(db.Model):
     __table_args__ = (
         Index('idx_attendance_student_date', 'student_id', 'date'),
         Index('idx_attendance_date', 'date'),
+        Index('idx_attendance_updated', 'updated_at', 'id'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -299,11 +318,73 @@ class Attendance(db.Model):
             'notes': self.notes
         }
 
+class AttendanceDailySummary(db.Model):
+    """Per-day, per-period attendance counts maintained alongside Attendance writes"""
+    __tablename__ = 'attendance_daily_summary'
+    __table_args__ = (
+        db.UniqueConstraint('date', 'period', name='uq_attendance_summary_date_period'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    period = db.Column(db.String(20), nullable=False, default='')  # '' when the record has no period
+    present_count = db.Column(db.Integer, nullable=False, default=0)
+    absent_count = db.Column(db.Integer, nullable=False, default=0)
+    late_count = db.Column(db.Integer, nullable=False, default=0)
+    excused_count = db.Column(db.Integer, nullable=False, default=0)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'date': self.date.isoformat() if self.date else None,
+            'period': self.period or None,
+            'present': self.present_count,
+            'absent': self.absent_count,
+            'late': self.late_count,
+            'excused': self.excused_count,
+            'total': self.total_count
+        }
+
+class DataVersion(db.Model):
+    """Change counter per table, bumped whenever rows of that table are written"""
+    __tablename__ = 'data_version'
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Tombstone(db.Model):
+    """A deleted or deactivated row, kept so delta syncs can remove it downstream"""
+    __tablename__ = 'tombstone'
+    __table_args__ = (
+        Index('idx_tombstone_table_created', 'table_name', 'created_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(20), nullable=False)  # deleted, deactivated
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.record_id,
+            'reason': self.reason,
+            'at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class IdCounter(db.Model):
+    """Next free number per identifier series (used where no DB sequence is available)"""
+    __tablename__ = 'id_counter'
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
+
 class Enrollment(db.Model):
     __tablename__ = 'enrollment'
     __table_args__ = (
         Index('idx_enrollment_student', 'student_id'),
         Index('idx_enrollment_subject', 'subject_id'),
+        Index('idx_enrollment_updated', 'updated_at', 'id'),
     )
     
     id = db.Column(db.Integer, primary_key=True)
@@ -460,6 +541,9 @@ class FeeStructure(db.Model):
 class FeePayment(db.Model):
     """Fee payments made by students"""
     __tablename__ = 'fee_payment'
+    __table_args__ = (
+        Index('idx_fee_payment_updated', 'updated_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     fee_structure_id = db.Column(db.Integer, db.ForeignKey('fee_structure.id'), nullable=False)
@@ -509,3 +593,50 @@ class FeeReceipt(db.Model):
             'receipt_number': self.receipt_number,
             'generated_date': self.generated_date.isoformat() if self.generated_date else None
         }
+
+class ExportJob(db.Model):
+    """An export generated in the background; the finished file lives in the artifact store"""
+    __tablename__ = 'export_job'
+    __table_args__ = (
+        Index('idx_export_job_user', 'user_id', 'created_at'),
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    dataset = db.Column(db.String(30), nullable=False)
+    format = db.Column(db.String(10), nullable=False)
+    filters = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    rows_total = db.Column(db.Integer)
+    filename = db.Column(db.String(255))
+    artifact_path = db.Column(db.String(500))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    @property
+    def progress(self):
+        """Percentage of rows written, 100 once the file is ready"""
+        if self.status == 'done':
+            return 100
+        if not self.rows_total:
+            return 0
+        return min(99, int(self.rows_done * 100 / self.rows_total))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'dataset': self.dataset,
+            'format': self.format,
+            'status': self.status,
+            'progress': self.progress,
+            'rows_done': self.rows_done,
+            'rows_total': self.rows_total,
+            'filename': self.filename,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,118 @@
+"""
+Keyset (cursor) pagination for the School Management System
+Pages are addressed by an opaque cursor holding the sort key of the row at
+the page boundary, so each page is an index range scan with a LIMIT instead
+of an OFFSET scan, and no COUNT(*) is required to move between pages.
+"""
+
+import base64
+import json
+from sqlalchemy import tuple_
+from models import db
+
+class KeysetPage:
+    """One page of results plus the cursors of its neighbours"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None, total_is_estimate=False):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def cursors(self):
+        return {
+            'next': self.next_cursor,
+            'prev': self.prev_cursor,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev
+        }
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction] + list(values), separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Return (direction, values); raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(payload, list) or len(payload) < 2 or payload[0] not in ('next', 'prev'):
+        raise ValueError("Invalid cursor")
+    return payload[0], payload[1:]
+
+def estimate_count(query):
+    """Row count for ``query`` from planner statistics where the database offers them.
+
+    PostgreSQL answers from EXPLAIN without executing the query; other
+    databases fall back to an exact COUNT. Returns (count, is_estimate).
+    """
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return query.order_by(None).count(), False
+
+    compiled = query.order_by(None).statement.compile(dialect=bind.dialect)
+    plan = db.session.connection().exec_driver_sql(
+        'EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows']), True
+
+def keyset_paginate(query, keys, cursor=None, per_page=20, count='exact'):
+    """Fetch one page of ``query`` ordered by the unique column tuple ``keys``.
+
+    ``count`` is 'exact' (COUNT(*), the default), 'estimated' (planner
+    statistics, opt-in; flagged by ``total_is_estimate``) or 'none'.
+    Raises ValueError for a cursor that does not match ``keys``.
+    """
+    direction, values = ('next', None)
+    if cursor:
+        direction, values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise ValueError("Cursor does not match this listing")
+
+    total, total_is_estimate = None, False
+    if count == 'exact':
+        total = query.order_by(None).count()
+    elif count == 'estimated':
+        total, total_is_estimate = estimate_count(query)
+
+    page_query = query
+    if values is not None:
+        boundary = tuple_(*keys)
+        page_query = page_query.filter(boundary > tuple_(*values) if direction == 'next' else boundary < tuple_(*values))
+
+    ordering = [key.asc() for key in keys] if direction == 'next' else [key.desc() for key in keys]
+    rows = page_query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+        has_next, has_prev = values is not None, has_more
+    else:
+        has_next, has_prev = has_more, values is not None
+
+    def row_key(row):
+        return [getattr(row, key.key) for key in keys]
+
+    return KeysetPage(
+        rows,
+        per_page,
+        next_cursor=encode_cursor('next', row_key(rows[-1])) if rows and has_next else None,
+        prev_cursor=encode_cursor('prev', row_key(rows[0])) if rows and has_prev else None,
+        total=total,
+        total_is_estimate=total_is_estimate
+    )
@@ -0,0 +1,151 @@
+"""
+PDF table reports for the School Management System
+A report is a title, a generation line with the row count, and the rows in
+a styled table. reportlab lays out one long Table in time that grows faster
+than its row count, so rows are placed in page-sized tables instead, one
+per page with the header repeated. Reports of PARALLEL_MIN_ROWS or more
+are rendered in parts of PAGES_PER_PART pages by a process pool and the
+parts are concatenated in order (this needs pypdf; without it every report
+is rendered in-process). Paragraph and table styles are built once per
+process and shared by every table.
+"""
+
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import lru_cache
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+PDF_MIMETYPE = 'application/pdf'
+
+# Data rows that fit on an A4 page below the header row, and on the first
+# page below the title and report info
+ROWS_PER_PAGE = 35
+FIRST_PAGE_ROWS = 29
+# Pages rendered by one pool task
+PAGES_PER_PART = 40
+# Smaller reports are not worth the round trip to the pool
+PARALLEL_MIN_ROWS = 5000
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _paragraph_styles():
+    styles = getSampleStyleSheet()
+    return styles['Title'], styles['Normal']
+
+def _page_table(header, rows):
+    table = Table([header] + rows, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+def _story(header, rows, title=None, info=None, first_page_rows=ROWS_PER_PAGE):
+    """Flowables for ``rows``, one page-sized table per page, optionally below a title"""
+    story = []
+    if title is not None:
+        title_style, normal_style = _paragraph_styles()
+        story += [Paragraph(title, title_style), Spacer(1, 20), Paragraph(info, normal_style), Spacer(1, 20)]
+
+    start, size = 0, first_page_rows
+    while start < len(rows) or start == 0:
+        if start:
+            story.append(PageBreak())
+        story.append(_page_table(header, rows[start:start + size]))
+        start, size = start + size, ROWS_PER_PAGE
+    return story
+
+def _render_part(header, rows, title=None, info=None, first_page_rows=ROWS_PER_PAGE):
+    """Render one part as a standalone PDF (runs in the pool)"""
+    output = io.BytesIO()
+    SimpleDocTemplate(output, pagesize=A4).build(_story(header, rows, title, info, first_page_rows))
+    return output.getvalue()
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+def _split_parts(rows):
+    """Row slices that each fill PAGES_PER_PART pages; the first also holds the title"""
+    first = FIRST_PAGE_ROWS + (PAGES_PER_PART - 1) * ROWS_PER_PAGE
+    size = PAGES_PER_PART * ROWS_PER_PAGE
+    parts = [rows[:first]]
+    parts += [rows[start:start + size] for start in range(first, len(rows), size)]
+    return parts
+
+def _render_parallel(target, header, rows, title, info, workers):
+    parts = _split_parts(rows)
+    count = len(parts)
+    rendered = _get_pool(workers).map(
+        _render_part,
+        [header] * count,
+        parts,
+        [title] + [None] * (count - 1),
+        [info] + [None] * (count - 1),
+        [FIRST_PAGE_ROWS] + [ROWS_PER_PAGE] * (count - 1)
+    )
+    writer = PdfWriter()
+    for part in rendered:
+        writer.append(PdfReader(io.BytesIO(part)))
+    writer.write(target)
+
+def write_table_pdf(target, title, header, rows, count_label='Rows', workers=1):
+    """Render ``rows`` under ``header`` as a PDF report into ``target`` (path or binary file).
+
+    With ``workers`` > 1, large reports are rendered in parallel by that
+    many processes. Returns the number of data rows.
+    """
+    header = list(header)
+    rows = [list(row) for row in rows]
+    info = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}<br/>Total {count_label}: {len(rows)}"
+
+    if workers > 1 and len(rows) >= PARALLEL_MIN_ROWS and PdfWriter is not None:
+        try:
+            _render_parallel(target, header, rows, title, info, workers)
+            return len(rows)
+        except BrokenProcessPool as e:
+            print(f"Warning: PDF worker pool failed ({e}), rendering in-process")
+            _discard_pool()
+            if hasattr(target, 'seek'):
+                target.seek(0)
+                target.truncate()
+
+    SimpleDocTemplate(target, pagesize=A4).build(_story(header, rows, title, info, FIRST_PAGE_ROWS))
+    return len(rows)
@@ -0,0 +1,107 @@
+// Background export jobs on the reports page
+// queueExport(dataset, format, filters) submits a job to /api/exports; jobs are
+// listed in #exportJobs and updated from export_job_updated socket events,
+// with polling as a fallback while any job is still running.
+
+(function() {
+    const list = document.getElementById('exportJobs');
+    const card = document.getElementById('exportJobsCard');
+    const jobs = {};
+    let pollTimer = null;
+
+    function isActive(job) {
+        return job.status === 'queued' || job.status === 'running';
+    }
+
+    function render() {
+        const ordered = Object.values(jobs).sort(function(a, b) {
+            return (b.created_at || '').localeCompare(a.created_at || '');
+        });
+        card.style.display = ordered.length ? 'block' : 'none';
+        list.innerHTML = '';
+        ordered.forEach(function(job) {
+            const item = document.createElement('li');
+
+            const label = document.createElement('span');
+            label.textContent = job.filename || (job.dataset + ' (' + job.format + ')');
+            item.appendChild(label);
+
+            const bar = document.createElement('div');
+            bar.className = 'export-job-progress';
+            const fill = document.createElement('span');
+            fill.style.width = (job.progress || 0) + '%';
+            bar.appendChild(fill);
+            item.appendChild(bar);
+
+            const status = document.createElement('span');
+            if (job.status === 'done') {
+                const link = document.createElement('a');
+                link.href = '/api/exports/' + job.id + '/download';
+                link.className = 'btn btn-sm btn-primary';
+                link.textContent = 'Download';
+                status.appendChild(link);
+            } else if (job.status === 'failed') {
+                status.textContent = 'Failed: ' + (job.error || 'unknown error');
+            } else {
+                status.textContent = job.status === 'queued' ? 'Queued' : (job.progress || 0) + '%';
+            }
+            item.appendChild(status);
+            list.appendChild(item);
+        });
+    }
+
+    function update(job) {
+        const previous = jobs[job.id];
+        jobs[job.id] = Object.assign({}, previous, job);
+        if (previous && isActive(previous) && job.status === 'done') {
+            window.location.href = '/api/exports/' + job.id + '/download';
+        }
+        render();
+        schedulePoll();
+    }
+
+    function poll() {
+        pollTimer = null;
+        Object.values(jobs).filter(isActive).forEach(function(job) {
+            fetch('/api/exports/' + job.id)
+                .then(function(response) { return response.json(); })
+                .then(function(result) { if (result.success) update(result.data); });
+        });
+    }
+
+    function schedulePoll() {
+        if (!pollTimer && Object.values(jobs).some(isActive)) {
+            pollTimer = setTimeout(poll, 3000);
+        }
+    }
+
+    window.queueExport = function(dataset, format, filters) {
+        fetch('/api/exports', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({dataset: dataset, format: format, filters: filters || {}})
+        })
+            .then(function(response) { return response.json(); })
+            .then(function(result) {
+                if (!result.success) {
+                    alert(result.message);
+                    return;
+                }
+                update(result.data);
+            });
+    };
+
+    if (typeof io !== 'undefined') {
+        io().on('export_job_updated', update);
+    }
+
+    fetch('/api/exports')
+        .then(function(response) { return response.json(); })
+        .then(function(result) {
+            if (result.success) {
+                result.data.forEach(function(job) { jobs[job.id] = job; });
+                render();
+                schedulePoll();
+            }
+        });
+})();
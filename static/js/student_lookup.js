@@ -0,0 +1,64 @@
+// Student typeahead for the grade and attendance forms
+// Markup: a text input with data-student-lookup="<id of the hidden student_id input>"
+// followed by an empty .lookup-results list.
+
+document.querySelectorAll('[data-student-lookup]').forEach(function(input) {
+    const hidden = document.getElementById(input.dataset.studentLookup);
+    const results = input.parentElement.querySelector('.lookup-results');
+    let timeout = null;
+    let controller = null;
+
+    function clearResults() {
+        results.innerHTML = '';
+        results.style.display = 'none';
+    }
+
+    function choose(student) {
+        hidden.value = student.id;
+        input.value = student.name + ' (' + student.code + ')';
+        clearResults();
+    }
+
+    function render(students) {
+        results.innerHTML = '';
+        if (!students.length) {
+            const empty = document.createElement('li');
+            empty.className = 'lookup-empty';
+            empty.textContent = 'No matching students';
+            results.appendChild(empty);
+        }
+        students.forEach(function(student) {
+            const item = document.createElement('li');
+            item.textContent = student.name + ' (' + student.code + ')';
+            item.addEventListener('mousedown', function(e) {
+                e.preventDefault();
+                choose(student);
+            });
+            results.appendChild(item);
+        });
+        results.style.display = 'block';
+    }
+
+    input.addEventListener('input', function() {
+        // Typing invalidates the previous selection until a result is picked
+        hidden.value = '';
+        clearTimeout(timeout);
+        const query = input.value.trim();
+        if (!query) {
+            clearResults();
+            return;
+        }
+        timeout = setTimeout(function() {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            fetch('/api/students/lookup?q=' + encodeURIComponent(query), {signal: controller.signal})
+                .then(function(response) { return response.json(); })
+                .then(function(payload) { render(payload.data || []); })
+                .catch(function(error) {
+                    if (error.name !== 'AbortError') console.error('Student lookup failed:', error);
+                });
+        }, 150);
+    });
+
+    input.addEventListener('blur', clearResults);
+});
@@ -0,0 +1,172 @@
+"""
+Versioned cache for dashboard and chart payloads
+Entries expire after a TTL and are invalidated as a whole whenever the
+realtime notify_* hooks report a data change, by bumping a version number
+that is part of every cache key.
+
+Two backends are available:
+- memory: in-process LRU, per worker
+- sqlite: a local SQLite file shared by every worker on the same host
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+class MemoryLRUBackend:
+    """Thread-safe in-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, namespace):
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    def bump_version(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteBackend:
+    """Cache entries and versions in a local SQLite file shared across processes"""
+
+    def __init__(self, path, max_entries=1024):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_entry_accessed ON cache_entry (accessed_at)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_version (namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute('SELECT value, expires_at FROM cache_entry WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE cache_entry SET accessed_at = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value, default=str), now + ttl, now)
+        )
+        conn.execute(
+            'DELETE FROM cache_entry WHERE expires_at < ? OR key IN '
+            '(SELECT key FROM cache_entry ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (now, self.max_entries)
+        )
+
+    def get_version(self, namespace):
+        row = self._connect().execute('SELECT version FROM cache_version WHERE namespace = ?', (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, namespace):
+        conn = self._connect()
+        conn.execute(
+            'INSERT INTO cache_version (namespace, version) VALUES (?, 1) '
+            'ON CONFLICT(namespace) DO UPDATE SET version = version + 1',
+            (namespace,)
+        )
+        return self.get_version(namespace)
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache_entry')
+
+class StatsCache:
+    """Versioned, TTL-bounded cache for computed statistics payloads"""
+
+    def __init__(self, namespace='stats', ttl=300):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = MemoryLRUBackend()
+
+    def init_app(self, app):
+        """Configure the backend from STATS_CACHE_* settings"""
+        self.ttl = app.config.get('STATS_CACHE_TTL', self.ttl)
+        backend = app.config.get('STATS_CACHE_BACKEND', 'memory')
+        if backend == 'sqlite':
+            path = app.config.get('STATS_CACHE_PATH') or os.path.join(tempfile.gettempdir(), 'sms_stats_cache.sqlite3')
+            try:
+                self.backend = SQLiteBackend(path)
+            except sqlite3.Error as e:
+                print(f"Warning: Could not open stats cache at {path}, using memory cache: {e}")
+                self.backend = MemoryLRUBackend()
+        else:
+            self.backend = MemoryLRUBackend()
+
+    def _versioned_key(self, key):
+        return f"{self.namespace}:v{self.backend.get_version(self.namespace)}:{key}"
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """Return the cached value for ``key`` or compute, store and return it"""
+        try:
+            versioned_key = self._versioned_key(key)
+            value = self.backend.get(versioned_key)
+        except sqlite3.Error as e:
+            print(f"Stats cache read error: {e}")
+            return compute()
+
+        if value is None:
+            value = compute()
+            try:
+                self.backend.set(versioned_key, value, ttl or self.ttl)
+            except sqlite3.Error as e:
+                print(f"Stats cache write error: {e}")
+        return value
+
+    def invalidate(self):
+        """Drop every cached payload by moving to a new version"""
+        try:
+            return self.backend.bump_version(self.namespace)
+        except sqlite3.Error as e:
+            print(f"Stats cache invalidation error: {e}")
+            self.backend.clear()
+
+stats_cache = StatsCache()
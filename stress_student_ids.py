@@ -0,0 +1,98 @@
+"""
+Concurrency stress test for student ID allocation
+Starts N threads that are released at the same moment and each insert one
+student with an ID from the allocator, then checks that every insert
+succeeded with a distinct ID. With --legacy the old "highest primary key
+plus one" scheme is used instead, for comparison.
+
+Runs against DATABASE_URL when set, otherwise a throwaway SQLite file:
+    python stress_student_ids.py [workers] [--legacy]
+Exits with status 1 when any ID collided.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+if not os.environ.get('DATABASE_URL'):
+    path = os.path.join(tempfile.gettempdir(), 'sms_stress_ids.sqlite3')
+    # SQLite serializes writers; wait for the lock rather than failing fast
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}?timeout=60'
+
+from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
+from app import app
+from models import db, Student
+from student_ids import next_student_id, sync_student_id_allocator
+
+def legacy_student_id():
+    last_student = Student.query.order_by(desc(Student.id)).first()
+    next_id = (last_student.id + 1) if last_student else 1
+    return f"STU{next_id:06d}"
+
+def insert_student(n, run, barrier, allocate):
+    with app.app_context():
+        barrier.wait()
+        try:
+            student = Student(
+                student_id=allocate(),
+                first_name='Stress',
+                last_name=f'Test {n}',
+                email=f'stress-{run}-{n}@example.com',
+                date_of_birth=date(2004, 1, 1),
+                gender='other',
+                grade_level='1st Year'
+            )
+            db.session.add(student)
+            db.session.commit()
+            return student.student_id, None
+        except IntegrityError:
+            db.session.rollback()
+            return None, 'collision'
+        except Exception as e:
+            db.session.rollback()
+            return None, str(e)
+
+def run(workers=200, legacy=False):
+    with app.app_context():
+        db.create_all()
+        sync_student_id_allocator()
+        dialect = db.engine.dialect.name
+
+    allocate = legacy_student_id if legacy else next_student_id
+    run_id = uuid.uuid4().hex[:8]
+    barrier = threading.Barrier(workers)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda n: insert_student(n, run_id, barrier, allocate), range(workers)))
+    elapsed = time.perf_counter() - started
+
+    ids = [student_id for student_id, _ in results if student_id]
+    collisions = sum(1 for _, error in results if error == 'collision')
+    other_errors = [error for _, error in results if error and error != 'collision']
+
+    print(f"Allocator: {'legacy max(id) + 1' if legacy else 'student_ids'} on {dialect}")
+    print(f"{workers} parallel inserts in {elapsed:.2f}s")
+    print(f"  inserted:      {len(ids)}")
+    print(f"  distinct IDs:  {len(set(ids))}")
+    print(f"  collisions:    {collisions}")
+    print(f"  other errors:  {len(other_errors)}")
+    for error in other_errors[:5]:
+        print(f"    {error}")
+
+    with app.app_context():
+        Student.query.filter(Student.email.like(f'stress-{run_id}-%')).delete(synchronize_session=False)
+        db.session.commit()
+
+    return collisions == 0 and len(ids) == len(set(ids)) == workers
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    ok = run(int(args[0]) if args else 200, legacy='--legacy' in sys.argv)
+    sys.exit(0 if ok else 1)
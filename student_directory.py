@@ -0,0 +1,218 @@
+"""
+Compact student/subject directory for form choice lists and typeahead lookup
+Holds (id, code, name) entries for active students and subjects, plus
+per-teacher subsets, in process. Entries are rebuilt only when the data
+versions of the underlying tables change, so opening a grade or attendance
+form no longer loads every Student as a full ORM object.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from models import db, Student, Subject, Enrollment, Teacher, SubjectTeacher
+from data_version import get_data_versions
+
+# A change to any of these tables can change a choice list
+TRACKED_TABLES = ('student', 'enrollment', 'subject', 'subject_teacher', 'teacher')
+
+class DirectoryEntry:
+    """One selectable student (code = student ID) or subject (code = subject code)"""
+    __slots__ = ('id', 'code', 'name')
+
+    def __init__(self, id, code, name):
+        self.id = id
+        self.code = code
+        self.name = name
+
+    def words(self):
+        words = self.name.lower().split()
+        if self.code:
+            words.append(self.code.lower())
+        return words
+
+    def as_choice(self):
+        return (self.id, self.name)
+
+    def to_dict(self):
+        return {'id': self.id, 'code': self.code, 'name': self.name}
+
+class DirectorySet:
+    """An ordered, immutable set of entries with id membership and prefix lookup"""
+    __slots__ = ('entries', 'by_id', '_index')
+
+    def __init__(self, entries=()):
+        self.entries = tuple(entries)
+        self.by_id = {entry.id: entry for entry in self.entries}
+        self._index = None
+
+    def __contains__(self, id):
+        return id in self.by_id
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, id):
+        return self.by_id.get(id)
+
+    def choices(self):
+        return [entry.as_choice() for entry in self.entries]
+
+    def _prefix_index(self):
+        # Sorted (word, position) pairs: every name word and the code of each entry
+        if self._index is None:
+            self._index = sorted(
+                (word, position)
+                for position, entry in enumerate(self.entries)
+                for word in set(entry.words())
+            )
+        return self._index
+
+    def lookup(self, query, limit=10):
+        """Up to ``limit`` entries where every word of ``query`` is a prefix of
+        a name word or of the code, in directory order"""
+        terms = (query or '').lower().split()
+        if not terms:
+            return []
+
+        # Walk the index for the most selective (longest) term and filter by
+        # the rest; stopping at ``limit`` keeps one-letter queries cheap
+        index = self._prefix_index()
+        lead = max(terms, key=len)
+        others = list(terms)
+        others.remove(lead)
+
+        positions = set()
+        i = bisect_left(index, (lead,))
+        while i < len(index) and len(positions) < limit and index[i][0].startswith(lead):
+            position = index[i][1]
+            if all(any(word.startswith(term) for word in self.entries[position].words()) for term in others):
+                positions.add(position)
+            i += 1
+        return [self.entries[position] for position in sorted(positions)]
+
+class StudentDirectory:
+    """Versioned in-process directory of active students and subjects"""
+
+    def __init__(self, max_teachers=256, max_lookups=1024):
+        self.max_teachers = max_teachers
+        self.max_lookups = max_lookups
+        self._lock = threading.Lock()
+        self._version = None
+        self._students = DirectorySet()
+        self._subjects = DirectorySet()
+        self._teachers = OrderedDict()
+        self._lookups = OrderedDict()
+
+    def _current_version(self):
+        versions = get_data_versions(TRACKED_TABLES)
+        return tuple(versions[name][0] for name in TRACKED_TABLES)
+
+    def _refresh(self):
+        version = self._current_version()
+        with self._lock:
+            if version == self._version:
+                return
+
+        students = DirectorySet(
+            DirectoryEntry(id, student_id, f"{first_name} {last_name}")
+            for id, student_id, first_name, last_name in db.session.query(
+                Student.id, Student.student_id, Student.first_name, Student.last_name
+            ).filter(Student.status == 'active').order_by(Student.last_name, Student.first_name, Student.id)
+        )
+        subjects = DirectorySet(
+            DirectoryEntry(id, code, name)
+            for id, code, name in db.session.query(Subject.id, Subject.code, Subject.name).filter(
+                Subject.is_active == True
+            ).order_by(Subject.name)
+        )
+
+        with self._lock:
+            self._version = version
+            self._students = students
+            self._subjects = subjects
+            self._teachers.clear()
+            self._lookups.clear()
+
+    def _load_teacher(self, teacher_user_id):
+        teacher_id = db.session.query(Teacher.id).filter_by(user_id=teacher_user_id).scalar()
+        if teacher_id is None:
+            return DirectorySet(), DirectorySet()
+
+        teacher_subjects = db.session.query(SubjectTeacher.subject_id).filter_by(teacher_id=teacher_id).subquery()
+
+        # Same scope as get_teacher_students(): any student enrolled in a subject they teach
+        students = DirectorySet(
+            DirectoryEntry(id, student_id, f"{first_name} {last_name}")
+            for id, student_id, first_name, last_name in db.session.query(
+                Student.id, Student.student_id, Student.first_name, Student.last_name
+            ).join(Enrollment, Enrollment.student_id == Student.id).filter(
+                Enrollment.subject_id.in_(teacher_subjects),
+                Enrollment.status == 'enrolled'
+            ).distinct().order_by(Student.last_name, Student.first_name, Student.id)
+        )
+        subjects = DirectorySet(
+            DirectoryEntry(id, code, name)
+            for id, code, name in db.session.query(Subject.id, Subject.code, Subject.name).filter(
+                Subject.id.in_(teacher_subjects),
+                Subject.is_active == True
+            ).order_by(Subject.name)
+        )
+        return students, subjects
+
+    def _teacher(self, teacher_user_id):
+        with self._lock:
+            cached = self._teachers.get(teacher_user_id)
+            if cached is not None:
+                self._teachers.move_to_end(teacher_user_id)
+                return cached
+
+        cached = self._load_teacher(teacher_user_id)
+        with self._lock:
+            self._teachers[teacher_user_id] = cached
+            while len(self._teachers) > self.max_teachers:
+                self._teachers.popitem(last=False)
+        return cached
+
+    def students(self, teacher_user_id=None):
+        """Active students, or the students a teacher teaches"""
+        self._refresh()
+        if teacher_user_id is not None:
+            return self._teacher(teacher_user_id)[0]
+        return self._students
+
+    def subjects(self, teacher_user_id=None):
+        """Active subjects, or the active subjects a teacher teaches"""
+        self._refresh()
+        if teacher_user_id is not None:
+            return self._teacher(teacher_user_id)[1]
+        return self._subjects
+
+    def subject_choices(self, teacher_user_id=None):
+        return self.subjects(teacher_user_id).choices()
+
+    def lookup_students(self, query, teacher_user_id=None, limit=10):
+        """Typeahead matches as dicts, cached per (teacher, query, limit) until the data changes"""
+        students = self.students(teacher_user_id)
+        key = (self._version, teacher_user_id, ' '.join((query or '').lower().split()), limit)
+        with self._lock:
+            cached = self._lookups.get(key)
+            if cached is not None:
+                self._lookups.move_to_end(key)
+                return cached
+
+        results = [entry.to_dict() for entry in students.lookup(key[2], limit)]
+        with self._lock:
+            self._lookups[key] = results
+            while len(self._lookups) > self.max_lookups:
+                self._lookups.popitem(last=False)
+        return results
+
+    def invalidate(self):
+        """Force a rebuild on next use"""
+        with self._lock:
+            self._version = None
+
+student_directory = StudentDirectory()
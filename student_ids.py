@@ -0,0 +1,106 @@
+"""
+Student ID allocation for the School Management System
+Student IDs have the form STU000123. Numbers come from a database sequence
+on PostgreSQL, where nextval() never blocks and never returns the same
+number twice (even across processes or after a rollback), and from a row in
+id_counter elsewhere, incremented inside the caller's transaction so that
+the database's write lock serializes concurrent allocations. Neither path
+reads the current maximum before writing, so concurrent inserts cannot be
+handed the same ID.
+"""
+
+from sqlalchemy import func, select, text
+from models import db, Student, IdCounter
+
+STUDENT_ID_PREFIX = 'STU'
+STUDENT_ID_SEQUENCE = 'student_id_seq'
+STUDENT_ID_COUNTER = 'student_id'
+
+# Fixed IDs that are not part of the numbering (the demo portal student)
+RESERVED_STUDENT_IDS = ('STU999999',)
+
+_sequence_ready = False
+
+def format_student_id(number):
+    return f"{STUDENT_ID_PREFIX}{number:06d}"
+
+def _highest_student_number():
+    """Highest number already used by a student row (primary key or STU code)"""
+    highest = db.session.query(func.max(Student.id)).scalar() or 0
+    codes = db.session.query(Student.student_id).filter(
+        Student.student_id.like(f'{STUDENT_ID_PREFIX}%'),
+        Student.student_id.notin_(RESERVED_STUDENT_IDS)
+    ).order_by(func.length(Student.student_id).desc(), Student.student_id.desc()).limit(100)
+    for (code,) in codes:
+        suffix = code[len(STUDENT_ID_PREFIX):]
+        if suffix.isdigit():
+            return max(highest, int(suffix))
+    return highest
+
+def sync_student_id_allocator():
+    """Create the sequence/counter if needed and move it past every ID in use.
+
+    Runs at startup and after students are inserted with explicit IDs
+    (sample data, restores); normal allocation never needs it.
+    """
+    global _sequence_ready
+    highest = _highest_student_number()
+    with db.engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {STUDENT_ID_SEQUENCE}"))
+            if highest:
+                # Never move the sequence backwards: numbers it already issued may be in flight
+                conn.execute(text(
+                    f"SELECT setval('{STUDENT_ID_SEQUENCE}', GREATEST(:highest, (SELECT last_value FROM {STUDENT_ID_SEQUENCE})))"
+                ), {'highest': highest})
+            _sequence_ready = True
+        else:
+            IdCounter.__table__.create(conn, checkfirst=True)
+            table = IdCounter.__table__
+            updated = conn.execute(table.update().where(
+                table.c.name == STUDENT_ID_COUNTER, table.c.next_value <= highest
+            ).values(next_value=highest + 1))
+            if updated.rowcount == 0 and conn.execute(
+                select(table.c.name).where(table.c.name == STUDENT_ID_COUNTER)
+            ).first() is None:
+                conn.execute(table.insert().values(name=STUDENT_ID_COUNTER, next_value=highest + 1))
+
+def _reserve_from_counter(connection, count):
+    table = IdCounter.__table__
+    # Write first: the UPDATE takes the lock that serializes concurrent allocators
+    updated = connection.execute(table.update().where(
+        table.c.name == STUDENT_ID_COUNTER
+    ).values(next_value=table.c.next_value + count))
+    if updated.rowcount == 0:
+        # Counter not initialized yet; a concurrent first use fails on the primary key
+        start = _highest_student_number() + 1
+        connection.execute(table.insert().values(name=STUDENT_ID_COUNTER, next_value=start + count))
+        return list(range(start, start + count))
+
+    next_value = connection.execute(select(table.c.next_value).where(table.c.name == STUDENT_ID_COUNTER)).scalar()
+    return list(range(next_value - count, next_value))
+
+def allocate_student_ids(count):
+    """Reserve ``count`` unique student IDs.
+
+    On PostgreSQL the numbers are final as soon as they are returned (a
+    rolled-back insert leaves a gap); elsewhere they are reserved by the
+    caller's transaction and released again if it rolls back.
+    """
+    if count <= 0:
+        return []
+
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        if not _sequence_ready:
+            sync_student_id_allocator()
+        numbers = connection.execute(
+            text("SELECT nextval(:sequence) FROM generate_series(1, :count)"),
+            {'sequence': STUDENT_ID_SEQUENCE, 'count': count}
+        ).scalars().all()
+    else:
+        numbers = _reserve_from_counter(connection, count)
+    return [format_student_id(number) for number in numbers]
+
+def next_student_id():
+    return allocate_student_ids(1)[0]
@@ -0,0 +1,220 @@
+"""
+Bulk student import for the School Management System
+Streams rows from a CSV or Excel (.xlsx) file, validates them in batches with
+the same rules as the Add Student form, allocates student IDs a block at a
+time and writes each batch with one COPY (PostgreSQL) or one executemany
+INSERT. Invalid rows are reported individually and do not stop the import.
+
+Usage from the command line:
+    python student_import.py students.csv [--dry-run]
+"""
+
+import codecs
+import csv
+import io
+import re
+from datetime import date, datetime
+from itertools import islice
+from openpyxl import load_workbook
+from werkzeug.datastructures import MultiDict
+from models import db, Student
+from forms import StudentImportRowForm
+from data_version import mark_data_changed
+from student_ids import allocate_student_ids
+
+BATCH_SIZE = 1000
+
+def _normalize_header(header):
+    return re.sub(r'[^a-z0-9]+', '_', str(header or '').strip().lower()).strip('_')
+
+_row_form = StudentImportRowForm()
+IMPORT_FIELDS = [field.name for field in _row_form]
+REQUIRED_FIELDS = ['first_name', 'last_name', 'email', 'date_of_birth', 'gender', 'grade_level']
+
+# Accept both the column name (first_name) and the form label (First Name)
+HEADER_ALIASES = {name: name for name in IMPORT_FIELDS}
+HEADER_ALIASES.update({_normalize_header(field.label.text): field.name for field in _row_form})
+
+class ImportResult:
+    """Outcome of an import: row counts plus per-row validation errors"""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.valid = 0
+        self.imported = 0
+        self.errors = []
+
+    def add_error(self, row_number, messages):
+        self.errors.append({'row': row_number, 'errors': messages})
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def to_dict(self, max_errors=None):
+        return {
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'valid': self.valid,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors[:max_errors] if max_errors else self.errors
+        }
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def _map_header(header):
+    columns = [HEADER_ALIASES.get(_normalize_header(name)) for name in header]
+    missing = [name for name in REQUIRED_FIELDS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return columns
+
+def _iter_rows(rows):
+    """Yield (row number, {field: text}) for a header row followed by data rows"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty")
+    columns = _map_header(header)
+
+    for row_number, row in enumerate(rows, start=2):
+        values = {column: _cell_text(value) for column, value in zip(columns, row) if column}
+        if any(values.values()):
+            yield row_number, values
+
+def iter_csv_rows(stream):
+    return _iter_rows(csv.reader(codecs.iterdecode(stream, 'utf-8-sig')))
+
+def iter_xlsx_rows(stream):
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from _iter_rows(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+def _validate_row(values):
+    """Cleaned column values, or None plus error messages"""
+    if values.get('gender'):
+        values['gender'] = values['gender'].lower()
+    form = StudentImportRowForm(MultiDict(values))
+    if not form.validate():
+        return None, [f"{form[name].label.text}: {messages[0]}" for name, messages in form.errors.items()]
+    return {name: (None if form[name].data == '' else form[name].data) for name in IMPORT_FIELDS}, None
+
+def _insert_students(records):
+    """Write a batch of student rows in one round trip"""
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2':
+        columns = list(records[0])
+        buffer = io.StringIO()
+        # In CSV format COPY reads an unquoted empty field as NULL
+        csv.writer(buffer).writerows([record[column] for column in columns] for record in records)
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {Student.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        connection.execute(Student.__table__.insert(), records)
+
+def _import_batch(batch, result, seen_emails):
+    valid = []
+    for row_number, values in batch:
+        result.rows += 1
+        data, errors = _validate_row(values)
+        if errors:
+            result.add_error(row_number, errors)
+            continue
+        email_key = data['email'].lower()
+        if email_key in seen_emails:
+            result.add_error(row_number, ["Email: Appears more than once in this file"])
+            continue
+        seen_emails.add(email_key)
+        valid.append((row_number, data))
+
+    if valid:
+        existing = {email for (email,) in db.session.query(Student.email).filter(
+            Student.email.in_([data['email'] for _, data in valid])
+        )}
+        for row_number, data in valid:
+            if data['email'] in existing:
+                result.add_error(row_number, ["Email: A student with this email already exists"])
+        valid = [(row_number, data) for row_number, data in valid if data['email'] not in existing]
+
+    result.valid += len(valid)
+    if not valid or result.dry_run:
+        return
+
+    now = datetime.utcnow()
+    student_ids = allocate_student_ids(len(valid))
+    records = [
+        dict(data, student_id=student_id, status='active', gpa=0.0,
+             enrollment_date=now.date(), created_at=now, updated_at=now)
+        for student_id, (_, data) in zip(student_ids, valid)
+    ]
+    _insert_students(records)
+    result.imported += len(records)
+
+def import_student_file(stream, filename, dry_run=False, batch_size=BATCH_SIZE):
+    """Import students from an open CSV/XLSX file (binary mode).
+
+    Valid rows are committed together at the end; invalid rows are skipped
+    and listed in the result. With ``dry_run`` nothing is written. Raises
+    ValueError when the file itself cannot be read (e.g. missing columns).
+    """
+    rows = iter_xlsx_rows(stream) if filename.lower().endswith('.xlsx') else iter_csv_rows(stream)
+    result = ImportResult(dry_run=dry_run)
+    seen_emails = set()
+
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            _import_batch(batch, result, seen_emails)
+
+        if result.imported:
+            # Core inserts bypass the flush listener that normally does this
+            mark_data_changed([Student.__tablename__])
+            db.session.commit()
+        else:
+            db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        raise
+    return result
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from app import app
+
+    if len(sys.argv) < 2:
+        print("Usage: python student_import.py <file.csv|file.xlsx> [--dry-run]")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    with app.app_context(), open(path, 'rb') as stream:
+        started = time.perf_counter()
+        result = import_student_file(stream, path, dry_run='--dry-run' in sys.argv)
+        elapsed = time.perf_counter() - started
+
+    print(f"Read {result.rows} rows in {elapsed:.1f}s: {result.imported} imported, {result.failed} rejected")
+    for error in result.errors[:50]:
+        print(f"  row {error['row']}: {'; '.join(error['errors'])}")
+    if result.failed > 50:
+        print(f"  ... and {result.failed - 50} more")
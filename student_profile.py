@@ -0,0 +1,168 @@
+"""
+Student 360 profile service for the School Management System
+Loads everything shown about one student (grades with their subjects,
+enrollments, recent attendance and its rate, fee balance and recent
+assignments) in a fixed number of queries, one per section, with the
+related subject/template/fee structure rows joined in rather than lazily
+loaded per row. Backs the student detail page and GET /api/students/<id>/full.
+"""
+
+from datetime import date, timedelta
+from sqlalchemy import and_, func
+from sqlalchemy.orm import contains_eager
+from models import db, Student, Subject, Grade, Attendance, Enrollment, Assignment, AssignmentTemplate, FeeStructure, FeePayment, Teacher, SubjectTeacher
+
+ALL_SECTIONS = ('grades', 'enrollments', 'attendance', 'fees', 'assignments')
+
+class StudentProfile:
+    """One student with the sections that were requested; others are None"""
+
+    def __init__(self, student):
+        self.student = student
+        self.grades = None
+        self.enrollments = None
+        self.attendance = None
+        self.attendance_days = None
+        self.attendance_rate = None
+        self.fees = None
+        self.assignments = None
+        self.teacher_can_access = True
+
+    def to_dict(self):
+        data = {'student': self.student.to_dict()}
+        if self.grades is not None:
+            data['grades'] = [
+                dict(grade.to_dict(), subject_name=grade.subject.name, semester=grade.semester, academic_year=grade.academic_year)
+                for grade in self.grades
+            ]
+        if self.enrollments is not None:
+            data['enrollments'] = [
+                dict(enrollment.to_dict(), subject_name=enrollment.subject.name, subject_code=enrollment.subject.code)
+                for enrollment in self.enrollments
+            ]
+        if self.attendance is not None:
+            data['attendance'] = {
+                'days': self.attendance_days,
+                'rate': self.attendance_rate,
+                'records': [record.to_dict() for record in self.attendance]
+            }
+        if self.fees is not None:
+            data['fees'] = dict(self.fees, items=[
+                dict(item, fee_structure=item['fee_structure'].to_dict()) for item in self.fees['items']
+            ])
+        if self.assignments is not None:
+            data['assignments'] = [
+                dict(assignment.to_dict(),
+                     title=assignment.template.title,
+                     max_score=assignment.template.max_score,
+                     due_date=assignment.template.due_date.isoformat() if assignment.template.due_date else None,
+                     is_late=assignment.is_late())
+                for assignment in self.assignments
+            ]
+        return data
+
+def _load_enrollments(student_id):
+    return Enrollment.query.join(Enrollment.subject).options(contains_eager(Enrollment.subject)).filter(
+        Enrollment.student_id == student_id
+    ).order_by(Enrollment.id).all()
+
+def _teacher_subject_ids(teacher_user_id):
+    return {row[0] for row in db.session.query(SubjectTeacher.subject_id).join(
+        Teacher, Teacher.id == SubjectTeacher.teacher_id
+    ).filter(Teacher.user_id == teacher_user_id)}
+
+def _load_grades(student_id, limit):
+    query = Grade.query.join(Grade.subject).options(contains_eager(Grade.subject)).filter(
+        Grade.student_id == student_id
+    ).order_by(Grade.date_recorded.desc(), Grade.id.desc())
+    return query.limit(limit).all() if limit else query.all()
+
+def _load_attendance(student_id, days):
+    start_date = date.today() - timedelta(days=days)
+    records = Attendance.query.filter(
+        Attendance.student_id == student_id,
+        Attendance.date >= start_date
+    ).order_by(Attendance.date.desc()).all()
+    present = sum(1 for record in records if record.status == 'present')
+    rate = round(present / len(records) * 100, 1) if records else 0
+    return records, rate
+
+def _load_fees(student_id, enrollments):
+    """Fee structures of the student's faculty with the amount paid against each"""
+    # As on the fee pages, the faculty is the subject of the first active enrollment
+    faculty_id = next((e.subject_id for e in enrollments if e.status == 'enrolled'), None)
+    summary = {'faculty_id': faculty_id, 'total_fees': 0, 'total_paid': 0, 'total_pending': 0, 'items': []}
+    if faculty_id is None:
+        return summary
+
+    rows = db.session.query(
+        FeeStructure,
+        func.coalesce(func.sum(FeePayment.amount_paid), 0)
+    ).outerjoin(FeePayment, and_(
+        FeePayment.fee_structure_id == FeeStructure.id,
+        FeePayment.student_id == student_id
+    )).filter(
+        FeeStructure.faculty_id == faculty_id,
+        FeeStructure.is_active == True
+    ).group_by(FeeStructure.id).order_by(FeeStructure.id).all()
+
+    today = date.today()
+    for fee_structure, paid_amount in rows:
+        pending_amount = max(0, fee_structure.amount - paid_amount)
+        summary['items'].append({
+            'fee_structure': fee_structure,
+            'total_amount': fee_structure.amount,
+            'paid_amount': paid_amount,
+            'pending_amount': pending_amount,
+            'is_overdue': bool(fee_structure.due_date and fee_structure.due_date < today and pending_amount > 0)
+        })
+        summary['total_fees'] += fee_structure.amount
+        summary['total_paid'] += paid_amount
+        summary['total_pending'] += pending_amount
+    return summary
+
+def _load_assignments(student_id, limit):
+    return Assignment.query.join(Assignment.template).options(contains_eager(Assignment.template)).filter(
+        Assignment.student_id == student_id
+    ).order_by(Assignment.created_at.desc(), Assignment.id.desc()).limit(limit).all()
+
+def load_student_profile(student_id, sections=ALL_SECTIONS, teacher_user_id=None,
+                         attendance_days=30, grade_limit=None, assignment_limit=5):
+    """Load a student and the requested ``sections``; None if no such student.
+
+    With ``teacher_user_id`` the teacher's access is checked first (the
+    student must be enrolled in a subject they teach); when it fails only
+    the student row is loaded and ``teacher_can_access`` is False.
+    """
+    student = db.session.get(Student, student_id)
+    if student is None:
+        return None
+
+    profile = StudentProfile(student)
+    sections = set(sections)
+
+    # Enrollments also decide teacher access and the fee faculty
+    enrollments = None
+    if 'enrollments' in sections or 'fees' in sections or teacher_user_id is not None:
+        enrollments = _load_enrollments(student_id)
+    if 'enrollments' in sections:
+        profile.enrollments = enrollments
+
+    if teacher_user_id is not None:
+        taught = _teacher_subject_ids(teacher_user_id)
+        profile.teacher_can_access = any(
+            enrollment.status == 'enrolled' and enrollment.subject_id in taught for enrollment in enrollments
+        )
+        if not profile.teacher_can_access:
+            return profile
+
+    if 'grades' in sections:
+        profile.grades = _load_grades(student_id, grade_limit)
+    if 'attendance' in sections:
+        profile.attendance_days = attendance_days
+        profile.attendance, profile.attendance_rate = _load_attendance(student_id, attendance_days)
+    if 'fees' in sections:
+        profile.fees = _load_fees(student_id, enrollments)
+    if 'assignments' in sections:
+        profile.assignments = _load_assignments(student_id, assignment_limit)
+    return profile
@@ -0,0 +1,153 @@
+"""
+Indexed student search for the School Management System
+One entry point for every student search box (staff list, REST API, exports
+and the student portal lookups), backed by:
+- PostgreSQL: pg_trgm GIN indexes, ranked by trigram similarity
+- SQLite: an FTS5 trigram table kept in sync by triggers, ranked by bm25
+- anything else: unindexed ILIKE, ordered by name
+"""
+
+from sqlalchemy import Float, Integer, String, func, literal_column, or_
+from models import db, Student
+
+# Trigram indexes need at least this many characters to narrow the search
+MIN_INDEXED_TERM_LENGTH = 3
+
+PG_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_student_first_name_trgm ON student USING gin (first_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_student_last_name_trgm ON student USING gin (last_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_student_email_trgm ON student USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_student_student_id_trgm ON student USING gin (student_id gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_student_full_name_trgm ON student USING gin ((first_name || ' ' || last_name) gin_trgm_ops)"
+]
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS student_fts USING fts5(student_id, first_name, last_name, email, full_name, tokenize='trigram')",
+    """CREATE TRIGGER IF NOT EXISTS student_fts_insert AFTER INSERT ON student BEGIN
+        INSERT INTO student_fts (rowid, student_id, first_name, last_name, email, full_name)
+        VALUES (new.id, new.student_id, new.first_name, new.last_name, new.email, new.first_name || ' ' || new.last_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS student_fts_delete AFTER DELETE ON student BEGIN
+        DELETE FROM student_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS student_fts_update AFTER UPDATE OF student_id, first_name, last_name, email ON student BEGIN
+        DELETE FROM student_fts WHERE rowid = old.id;
+        INSERT INTO student_fts (rowid, student_id, first_name, last_name, email, full_name)
+        VALUES (new.id, new.student_id, new.first_name, new.last_name, new.email, new.first_name || ' ' || new.last_name);
+    END"""
+]
+
+SQLITE_FTS_BACKFILL = """
+    INSERT INTO student_fts (rowid, student_id, first_name, last_name, email, full_name)
+    SELECT id, student_id, first_name, last_name, email, first_name || ' ' || last_name FROM student
+"""
+
+# Detected once per process: 'pg_trgm', 'fts5' or 'like'
+_backend = None
+
+def ensure_search_indexes():
+    """Create the search indexes for the current database (idempotent)"""
+    global _backend
+    dialect = db.engine.dialect.name
+    try:
+        with db.engine.begin() as conn:
+            if dialect == 'postgresql':
+                for ddl in PG_SEARCH_DDL:
+                    conn.execute(db.text(ddl))
+            elif dialect == 'sqlite':
+                # Triggers disappear with the student table (e.g. after drop_all),
+                # in which case the FTS rows are stale and must be rebuilt
+                synced = conn.execute(db.text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'student_fts_insert'"
+                )).first()
+                for ddl in SQLITE_SEARCH_DDL:
+                    conn.execute(db.text(ddl))
+                if not synced:
+                    conn.execute(db.text("DELETE FROM student_fts"))
+                    conn.execute(db.text(SQLITE_FTS_BACKFILL))
+    except Exception as e:
+        print(f"Warning: Could not create student search indexes, falling back to LIKE search: {e}")
+    _backend = None
+
+def _search_backend():
+    global _backend
+    if _backend is None:
+        dialect = db.engine.dialect.name
+        _backend = 'like'
+        try:
+            if dialect == 'postgresql':
+                if db.session.execute(db.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first():
+                    _backend = 'pg_trgm'
+            elif dialect == 'sqlite':
+                if db.session.execute(db.text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'student_fts'"
+                )).first():
+                    _backend = 'fts5'
+        except Exception as e:
+            print(f"Warning: Could not detect student search backend: {e}")
+    return _backend
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+def _full_name():
+    # Must match the expression of idx_student_full_name_trgm, so the
+    # separator is inlined rather than sent as a bound parameter
+    return Student.first_name + literal_column("' '", String) + Student.last_name
+
+def _like_condition(term):
+    pattern = _like_pattern(term)
+    return or_(
+        Student.first_name.ilike(pattern, escape='\\'),
+        Student.last_name.ilike(pattern, escape='\\'),
+        Student.email.ilike(pattern, escape='\\'),
+        Student.student_id.ilike(pattern, escape='\\'),
+        _full_name().ilike(pattern, escape='\\')
+    )
+
+def apply_student_search(query, term, rank=True):
+    """Restrict a Student query to rows matching ``term``, best matches first.
+
+    Matching is a case-insensitive substring search over first name, last
+    name, full name, email and student ID. Callers may append further
+    order_by() clauses as tie-breakers, or pass ``rank=False`` when they
+    impose their own ordering (e.g. keyset pagination).
+    """
+    term = (term or '').strip()
+    if not term:
+        return query
+
+    backend = _search_backend()
+
+    if backend == 'fts5' and len(term) >= MIN_INDEXED_TERM_LENGTH:
+        matches = db.text(
+            "SELECT rowid AS id, bm25(student_fts) AS rank FROM student_fts WHERE student_fts MATCH :match"
+        ).bindparams(match='"' + term.replace('"', '""') + '"').columns(id=Integer, rank=Float).subquery()
+        query = query.join(matches, Student.id == matches.c.id)
+        return query.order_by(matches.c.rank) if rank else query
+
+    query = query.filter(_like_condition(term))
+
+    if backend == 'pg_trgm' and rank:
+        similarity = func.greatest(
+            func.similarity(_full_name(), term),
+            func.similarity(Student.email, term),
+            func.similarity(Student.student_id, term)
+        )
+        query = query.order_by(similarity.desc())
+
+    return query
+
+def find_student(term, status='active'):
+    """Student portal lookup: an exact student ID, otherwise the best name match"""
+    term = (term or '').strip()
+    if not term:
+        return None
+
+    if term.startswith('STU') or term.isdigit():
+        return Student.query.filter_by(student_id=term, status=status).first()
+
+    query = apply_student_search(Student.query.filter(Student.status == status), term)
+    return query.order_by(Student.last_name, Student.first_name, Student.id).first()